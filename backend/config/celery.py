@@ -3,6 +3,7 @@ Celery configuration for the task OCR processor.
 """
 import os
 from celery import Celery
+from celery.signals import worker_process_init
 
 # Set the default Django settings module
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
@@ -16,6 +17,19 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 app.autodiscover_tasks()
 
 
+@worker_process_init.connect
+def preload_ocr_service(**kwargs):
+    """Start loading the OCR model as soon as a worker process forks."""
+    from django.conf import settings
+
+    if settings.OCR_PRELOAD:
+        from tasks.ocr_service import get_ocr_service
+        get_ocr_service(
+            confidence_threshold=settings.OCR_CONFIDENCE_THRESHOLD,
+            preload=True
+        )
+
+
 @app.task(bind=True, ignore_result=True)
 def debug_task(self):
     print(f'Request: {self.request!r}')
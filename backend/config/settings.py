@@ -38,6 +38,7 @@ INSTALLED_APPS = [
     # Third party apps
     'rest_framework',
     'corsheaders',
+    'django_admin_inline_paginator',
 
     # Local apps
     'tasks',
@@ -84,6 +85,12 @@ DATABASES = {
         'PASSWORD': env('POSTGRES_PASSWORD', default='taskocr_password'),
         'HOST': env('POSTGRES_HOST', default='localhost'),
         'PORT': env('POSTGRES_PORT', default='5432'),
+        # Reuse connections across requests/tasks instead of reconnecting
+        'CONN_MAX_AGE': env.int('DB_CONN_MAX_AGE', default=60),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'connect_timeout': 5,
+        },
     }
 }
 
@@ -126,26 +133,41 @@ CORS_ALLOWED_ORIGINS = env.list('CORS_ALLOWED_ORIGINS', default=[
 # REST Framework Settings
 REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'tasks.renderers.ORJSONRenderer',
     ],
     'DEFAULT_PARSER_CLASSES': [
-        'rest_framework.parsers.JSONParser',
+        'tasks.parsers.ORJSONParser',
         'rest_framework.parsers.MultiPartParser',
         'rest_framework.parsers.FormParser',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'tasks.pagination.CreatedAtCursorPagination',
     'PAGE_SIZE': 20,
 }
 
+# Cache (use a Redis URL in deployment, e.g. redis://redis:6379/1)
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
 # Celery Configuration
 CELERY_BROKER_URL = env('CELERY_BROKER_URL', default='redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = env('CELERY_RESULT_BACKEND', default='redis://localhost:6379/0')
-CELERY_ACCEPT_CONTENT = ['json']
-CELERY_TASK_SERIALIZER = 'json'
-CELERY_RESULT_SERIALIZER = 'json'
+# Redis used to publish job status changes to long-polling status requests
+JOB_EVENTS_REDIS_URL = env('JOB_EVENTS_REDIS_URL', default=CELERY_BROKER_URL)
+# Upper bound (seconds) a /api/status/<id>/wait/ request may block
+JOB_STATUS_WAIT_MAX = env.int('JOB_STATUS_WAIT_MAX', default=25)
+# json stays accepted so messages queued before the msgpack switch still run
+CELERY_ACCEPT_CONTENT = ['msgpack', 'json']
+CELERY_TASK_SERIALIZER = 'msgpack'
+CELERY_RESULT_SERIALIZER = 'msgpack'
+CELERY_TASK_COMPRESSION = 'zstd'
+CELERY_RESULT_COMPRESSION = 'zstd'
 CELERY_TIMEZONE = TIME_ZONE
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60  # 30 minutes
+# Must exceed the task time limit and the longest retry backoff (600s), or
+# Redis redelivers unacknowledged (acks_late / countdown) tasks to another worker
+CELERY_BROKER_TRANSPORT_OPTIONS = {'visibility_timeout': 60 * 60}
 
 # MinIO/S3 Configuration
 MINIO_ENDPOINT = env('MINIO_ENDPOINT', default='localhost:9000')
@@ -157,10 +179,10 @@ MINIO_USE_SSL = env.bool('MINIO_USE_SSL', default=False)
 # Storage Configuration
 STORAGES = {
     'default': {
-        'BACKEND': 'storages.backends.s3boto3.S3Boto3Storage',
+        'BACKEND': 'tasks.storage.TaskImageStorage',
     },
     'staticfiles': {
-        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+        'BACKEND': 'whitenoise.storage.CompressedStaticFilesStorage',
     },
 }
 
@@ -173,11 +195,24 @@ AWS_S3_USE_SSL = MINIO_USE_SSL
 AWS_S3_VERIFY = False
 AWS_DEFAULT_ACL = None
 AWS_QUERYSTRING_AUTH = False
-AWS_S3_FILE_OVERWRITE = False
+# Upload keys are random (see tasks.views.upload_key), so skip the HEAD
+# request S3Boto3Storage makes to find a free name when overwrite is off
+AWS_S3_FILE_OVERWRITE = True
+# Uploads go multipart (threaded parts of this size) above this size;
+# see tasks.storage.TaskImageStorage
+S3_MULTIPART_SIZE = 5 * 1024 * 1024
 
 # OCR Settings
 OCR_CONFIDENCE_THRESHOLD = env.float('OCR_CONFIDENCE_THRESHOLD', default=0.6)
+# Longest image edge (pixels) passed to OCR; larger uploads are downscaled
+OCR_MAX_EDGE = env.int('OCR_MAX_EDGE', default=1536)
+# Load the OCR model in the background when a worker process starts
+OCR_PRELOAD = env.bool('OCR_PRELOAD', default=False)
 
 # File Upload Settings
 MAX_UPLOAD_SIZE = 10 * 1024 * 1024  # 10 MB
-ALLOWED_IMAGE_TYPES = ['image/jpeg', 'image/png', 'image/jpg', 'image/heic']
+# Spool uploads above 256 KB to a temp file instead of holding them in RAM
+FILE_UPLOAD_MAX_MEMORY_SIZE = 256 * 1024
+# Non-file request body limit (uploads are excluded from this check)
+DATA_UPLOAD_MAX_MEMORY_SIZE = 1 * 1024 * 1024
+ALLOWED_IMAGE_TYPES = frozenset(('image/jpeg', 'image/png', 'image/jpg', 'image/heic'))
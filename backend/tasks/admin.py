@@ -2,9 +2,30 @@
 Django admin configuration for task OCR processing.
 """
 from django.contrib import admin
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django_admin_inline_paginator.admin import TabularInlinePaginated
 from .models import ProcessingJob, ExtractedTask
 
 
+class ExtractedTaskInline(TabularInlinePaginated):
+    """Paginated inline listing the tasks extracted for a job."""
+    model = ExtractedTask
+    per_page = 25
+    fields = [
+        'position_index',
+        'task_name',
+        'assignee',
+        'due_date',
+        'priority',
+        'confidence_score',
+    ]
+
+    def get_queryset(self, request):
+        """Fetch only the columns rendered by the inline."""
+        return super().get_queryset(request).only('id', 'job', *self.fields)
+
+
 @admin.register(ProcessingJob)
 class ProcessingJobAdmin(admin.ModelAdmin):
     """Admin interface for ProcessingJob."""
@@ -46,11 +67,27 @@ class ProcessingJobAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+    inlines = [ExtractedTaskInline]
+
+    def get_queryset(self, request):
+        """
+        Count tasks in the changelist query itself.
+
+        A correlated subquery is only evaluated for the rows on the page
+        (unless sorting by it), unlike a JOIN + GROUP BY over all jobs.
+        """
+        task_counts = ExtractedTask.objects.filter(
+            job=OuterRef('pk')
+        ).order_by().values('job').annotate(n=Count('id')).values('n')
+        return super().get_queryset(request).annotate(
+            _task_count=Coalesce(Subquery(task_counts, output_field=IntegerField()), 0)
+        )
 
     def task_count(self, obj):
         """Display count of extracted tasks."""
-        return obj.extracted_tasks.count()
+        return obj._task_count
     task_count.short_description = 'Tasks'
+    task_count.admin_order_field = '_task_count'
 
 
 @admin.register(ExtractedTask)
@@ -64,6 +101,7 @@ class ExtractedTaskAdmin(admin.ModelAdmin):
         'due_date',
         'confidence_score',
     ]
+    list_select_related = ('job',)
     list_filter = ['priority', 'created_at']
     search_fields = ['task_name', 'description', 'assignee']
     readonly_fields = ['created_at', 'updated_at']
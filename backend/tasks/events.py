@@ -0,0 +1,72 @@
+"""
+Job status notifications over Redis pub/sub.
+
+Workers publish when a job reaches a final state so that long-polling
+status requests can return as soon as it happens.
+"""
+import logging
+import time
+
+import redis
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_client = None
+
+
+def job_channel(transaction_id):
+    """Pub/sub channel announcing status changes of a job."""
+    return f'job:{transaction_id}'
+
+
+def get_client():
+    """Shared Redis client (connection pool) for job events."""
+    global _client
+
+    if _client is None:
+        _client = redis.Redis.from_url(settings.JOB_EVENTS_REDIS_URL)
+    return _client
+
+
+def publish_job_status(transaction_id, status):
+    """
+    Announce a job status change.
+
+    Failures are logged and swallowed; waiting clients fall back to their
+    timeout, so a missed event never fails the job itself.
+    """
+    try:
+        get_client().publish(job_channel(transaction_id), status)
+    except redis.RedisError as e:
+        logger.warning(f"Failed to publish status for job {transaction_id}: {e}")
+
+
+def subscribe_job_status(transaction_id):
+    """
+    Subscribe to a job's status channel.
+
+    Returns:
+        PubSub subscribed to the channel; the caller must close() it
+    """
+    pubsub = get_client().pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(job_channel(transaction_id))
+    return pubsub
+
+
+def wait_for_message(pubsub, timeout):
+    """
+    Block until a status message arrives or the timeout expires.
+
+    Returns:
+        The published status, or None on timeout
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        # Returns None early for the subscribe confirmation, hence the loop
+        message = pubsub.get_message(timeout=remaining)
+        if message is not None and message['type'] == 'message':
+            return message['data'].decode()
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-15 22:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='processingjob',
+            name='tasks_proce_created_1a3b7d_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='processingjob',
+            name='tasks_proce_status_973685_idx',
+        ),
+        migrations.AddIndex(
+            model_name='processingjob',
+            index=models.Index(fields=['status', '-created_at'], name='job_status_created_idx'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+from django.db import migrations, models
+
+
+STATUS_CODES = {
+    'pending': 0,
+    'processing': 1,
+    'completed': 2,
+    'failed': 3,
+}
+
+
+def status_to_code(apps, schema_editor):
+    ProcessingJob = apps.get_model('tasks', 'ProcessingJob')
+    for name, code in STATUS_CODES.items():
+        ProcessingJob.objects.filter(status=name).update(status_code=code)
+
+
+def code_to_status(apps, schema_editor):
+    ProcessingJob = apps.get_model('tasks', 'ProcessingJob')
+    for name, code in STATUS_CODES.items():
+        ProcessingJob.objects.filter(status_code=code).update(status=name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0002_processingjob_status_created_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='processingjob',
+            name='job_status_created_idx',
+        ),
+        migrations.AddField(
+            model_name='processingjob',
+            name='status_code',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.RunPython(status_to_code, code_to_status),
+        migrations.RemoveField(
+            model_name='processingjob',
+            name='status',
+        ),
+        migrations.RenameField(
+            model_name='processingjob',
+            old_name='status_code',
+            new_name='status',
+        ),
+        migrations.AlterField(
+            model_name='processingjob',
+            name='status',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'Pending'), (1, 'Processing'), (2, 'Completed'), (3, 'Failed')], db_index=True, default=0),
+        ),
+        migrations.AddIndex(
+            model_name='processingjob',
+            index=models.Index(fields=['status', '-created_at'], name='job_status_created_idx'),
+        ),
+    ]
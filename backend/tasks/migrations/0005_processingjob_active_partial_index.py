@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-15 22:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0004_processingjob_drop_redundant_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='processingjob',
+            index=models.Index(condition=models.Q(('status__in', [0, 1])), fields=['status', 'created_at'], name='job_active_idx'),
+        ),
+    ]
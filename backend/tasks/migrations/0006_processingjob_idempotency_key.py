@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-15 22:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0005_processingjob_active_partial_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='processingjob',
+            name='idempotency_key',
+            field=models.CharField(blank=True, max_length=255, null=True, unique=True),
+        ),
+    ]
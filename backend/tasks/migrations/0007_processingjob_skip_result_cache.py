@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-15 22:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0006_processingjob_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='processingjob',
+            name='skip_result_cache',
+            field=models.BooleanField(default=False),
+        ),
+    ]
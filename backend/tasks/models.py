@@ -2,20 +2,34 @@
 Models for task OCR processing.
 """
 import uuid
+from django.core.cache import cache
 from django.db import models
+from django.db.models import Q
 from django.utils import timezone
 
+from .events import publish_job_status
+
+
+def job_status_cache_key(transaction_id):
+    """Cache key holding the status API response of an in-flight job."""
+    return f'jobstatus:{transaction_id}'
+
+
+class JobStatus(models.IntegerChoices):
+    """Lifecycle states of a ProcessingJob."""
+    PENDING = 0, 'Pending'
+    PROCESSING = 1, 'Processing'
+    COMPLETED = 2, 'Completed'
+    FAILED = 3, 'Failed'
+
 
 class ProcessingJob(models.Model):
     """
     Represents an image processing job for OCR extraction.
     """
-    STATUS_CHOICES = [
-        ('pending', 'Pending'),
-        ('processing', 'Processing'),
-        ('completed', 'Completed'),
-        ('failed', 'Failed'),
-    ]
+    Status = JobStatus
+
+    STATUS_CACHE_TIMEOUT = 2  # seconds; absorbs client polling of in-flight jobs
 
     # Transaction ID (public-facing identifier)
     transaction_id = models.UUIDField(
@@ -30,12 +44,15 @@ class ProcessingJob(models.Model):
     original_filename = models.CharField(max_length=255)
     image_size = models.IntegerField(help_text='Size in bytes')
 
+    # Client-supplied Idempotency-Key; repeating an upload with it returns this job
+    idempotency_key = models.CharField(max_length=255, unique=True, null=True, blank=True)
+    # Uploaded with Cache-Control: no-cache; OCR runs even for an image seen before
+    skip_result_cache = models.BooleanField(default=False)
+
     # Processing status
-    status = models.CharField(
-        max_length=20,
-        choices=STATUS_CHOICES,
-        default='pending',
-        db_index=True
+    status = models.PositiveSmallIntegerField(
+        choices=Status.choices,
+        default=Status.PENDING
     )
 
     # Celery task tracking
@@ -46,7 +63,7 @@ class ProcessingJob(models.Model):
     error_traceback = models.TextField(blank=True, null=True)
 
     # Timestamps
-    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     started_at = models.DateTimeField(null=True, blank=True)
     completed_at = models.DateTimeField(null=True, blank=True)
@@ -62,46 +79,83 @@ class ProcessingJob(models.Model):
     class Meta:
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['-created_at']),
-            models.Index(fields=['status']),
+            models.Index(
+                fields=['status', '-created_at'],
+                name='job_status_created_idx'
+            ),
+            # Unfiltered listings still order by -created_at
+            models.Index(fields=['-created_at'], name='job_created_idx'),
+            # Small partial index for polling in-flight jobs
+            models.Index(
+                fields=['status', 'created_at'],
+                name='job_active_idx',
+                condition=Q(status__in=[JobStatus.PENDING, JobStatus.PROCESSING]),
+            ),
         ]
 
     def __str__(self):
-        return f"Job {self.transaction_id} - {self.status}"
+        return f"Job {self.transaction_id} - {self.status_name}"
+
+    @property
+    def status_name(self):
+        """Lowercase status key exposed by the API (e.g. 'pending')."""
+        return self.Status(self.status).name.lower()
+
+    def _update_fields(self, **fields):
+        """
+        Persist fields with a single UPDATE and mirror them on the instance.
+
+        Bypasses save() so state transitions skip model signals and
+        auto_now handling; updated_at is therefore set explicitly.
+        Drops the cached status response so pollers see the change.
+        """
+        fields['updated_at'] = timezone.now()
+        type(self).objects.filter(pk=self.pk).update(**fields)
+        for name, value in fields.items():
+            setattr(self, name, value)
+        cache.delete(job_status_cache_key(self.transaction_id))
+
+    def mark_pending(self):
+        """Mark job as pending again, e.g. before a retry."""
+        self._update_fields(status=self.Status.PENDING)
 
     def mark_processing(self, celery_task_id=None):
         """Mark job as processing."""
-        self.status = 'processing'
-        self.started_at = timezone.now()
+        fields = {
+            'status': self.Status.PROCESSING,
+            'started_at': timezone.now(),
+        }
         if celery_task_id:
-            self.celery_task_id = celery_task_id
-        self.save(update_fields=['status', 'started_at', 'celery_task_id', 'updated_at'])
+            fields['celery_task_id'] = celery_task_id
+        self._update_fields(**fields)
 
     def mark_completed(self, ocr_confidence=None):
         """Mark job as completed."""
-        self.status = 'completed'
-        self.completed_at = timezone.now()
+        completed_at = timezone.now()
+        fields = {
+            'status': self.Status.COMPLETED,
+            'completed_at': completed_at,
+        }
         if self.started_at:
-            self.processing_duration = (self.completed_at - self.started_at).total_seconds()
+            fields['processing_duration'] = (completed_at - self.started_at).total_seconds()
         if ocr_confidence:
-            self.ocr_confidence = ocr_confidence
-        self.save(update_fields=[
-            'status', 'completed_at', 'processing_duration',
-            'ocr_confidence', 'updated_at'
-        ])
+            fields['ocr_confidence'] = ocr_confidence
+        self._update_fields(**fields)
+        publish_job_status(self.transaction_id, self.status_name)
 
     def mark_failed(self, error_message, error_traceback=None):
         """Mark job as failed."""
-        self.status = 'failed'
-        self.completed_at = timezone.now()
-        self.error_message = error_message
-        self.error_traceback = error_traceback
+        completed_at = timezone.now()
+        fields = {
+            'status': self.Status.FAILED,
+            'completed_at': completed_at,
+            'error_message': error_message,
+            'error_traceback': error_traceback,
+        }
         if self.started_at:
-            self.processing_duration = (self.completed_at - self.started_at).total_seconds()
-        self.save(update_fields=[
-            'status', 'completed_at', 'error_message',
-            'error_traceback', 'processing_duration', 'updated_at'
-        ])
+            fields['processing_duration'] = (completed_at - self.started_at).total_seconds()
+        self._update_fields(**fields)
+        publish_job_status(self.transaction_id, self.status_name)
 
 
 class ExtractedTask(models.Model):
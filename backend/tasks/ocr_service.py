@@ -6,16 +6,132 @@ Supports multiple OCR backends:
 2. EasyOCR - Lightweight neural OCR (CPU/GPU)
 3. Tesseract - Traditional OCR (CPU only)
 """
+import calendar
+import copy
+import functools
+import hashlib
 import logging
 import re
 import os
-from datetime import datetime, timedelta
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
 from typing import List, Dict, Any, Optional
 from PIL import Image
 import io
 
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:  # pragma: no cover - orjson ships with the base requirements
+    import json
+    _loads = json.loads
+
 logger = logging.getLogger(__name__)
 
+# Task line markers: bullets/numbers optionally followed by . or )
+_BULLET_RE = re.compile(r'^[\-\*\•\d]+[\.\)]?\s*')
+_BULLET_START_RE = re.compile(r'^[\-\*\•\d]+[\.\)]?\s+')
+# Stricter variant (. or ) required) used for Tesseract lines
+_NUMBERED_BULLET_RE = re.compile(r'^[\-\*\•\d]+[\.\)]\s*')
+_NUMBERED_BULLET_START_RE = re.compile(r'^[\-\*\•\d]+[\.\)]\s+')
+
+_INLINE_DATE_RE = re.compile(r'\s+\d{1,2}[/\-\.]\d{1,2}[/\-\.]\d{2,4}')
+_TRAILING_DATE_RE = re.compile(r'\s+\d{1,2}[/\-\.]\d{1,2}[/\-\.]\d{2,4}.*$')
+_TRAILING_PUNCTUATION_RE = re.compile(r'[^\w\s]+$')
+
+_DATE_NUM_RE = re.compile(r'(\d{1,2})/(\d{1,2})/(\d{2,4})')
+_DATE_ISO_RE = re.compile(r'(\d{4})-(\d{2})-(\d{2})')
+_DATE_MON_RE = re.compile(r'(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]* (\d{1,2})')
+
+_ASSIGNEE_RES = (
+    re.compile(r'[→>]\s*([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)'),  # → Name or -> Name (arrow pattern, handles names like "Aykut" or "Hasan Smith")
+    re.compile(r'@(\w+)'),  # @username
+    re.compile(r'assigned to:?\s*([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)'),  # assigned to: Name
+    re.compile(r'owner:?\s*([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)'),  # owner: Name
+    re.compile(r'\[([A-Z][a-z]+)\]'),  # [Name]
+    re.compile(r'\(([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)\)'),  # (Name) in parentheses
+)
+
+# Due date strings emitted by dots.ocr: Y-m-d / Y/m/d, or d/m/Y falling back to m/d/Y
+_DUE_DATE_YMD_RE = re.compile(r'^(\d{4})([-/])(\d{1,2})\2(\d{1,2})$')
+_DUE_DATE_DMY_RE = re.compile(r'^(\d{1,2})/(\d{1,2})/(\d{4})$')
+
+# Markdown code fence the model sometimes wraps its JSON answer in
+_JSON_FENCE_RE = re.compile(r'^\s*```(?:json)?\s*|\s*```\s*$', re.IGNORECASE)
+
+_TASK_MARKERS = ('todo', 'task', '☐', '□')
+_URGENT_MARKERS = ('urgent', '!!!', 'asap', 'critical', 'high priority')
+_HIGH_MARKERS = ('high', '!!', 'important')
+_LOW_MARKERS = ('low', 'minor', 'whenever')
+
+
+@functools.lru_cache(maxsize=256)
+def _assignee_removal_patterns(assignee: str):
+    """Compile the patterns that strip an assignee mention from task text."""
+    name = re.escape(assignee)
+    return (
+        # Arrow patterns with assignee (and an optional trailing date)
+        re.compile(rf'\s*[→>]\s*{name}(?:\s+\d{{1,2}}[/\-\.]\d{{1,2}}[/\-\.]\d{{2,4}})?'),
+        # Other assignee patterns
+        re.compile(rf'@{name}'),
+        re.compile(rf'assigned to:?\s*{name}', re.IGNORECASE),
+        re.compile(rf'owner:?\s*{name}', re.IGNORECASE),
+        re.compile(rf'\[{name}\]'),
+        re.compile(rf'\({name}\)'),
+    )
+
+
+def _downscale(image: Image.Image, max_size: int) -> Image.Image:
+    """
+    Shrink an image so its longest side is at most max_size.
+
+    Uses OpenCV's area interpolation (multithreaded, SIMD) when cv2 is
+    installed, which it is wherever EasyOCR is; otherwise PIL LANCZOS.
+    """
+    if max(image.size) <= max_size:
+        return image
+
+    ratio = max_size / max(image.size)
+    new_size = tuple(max(1, int(dim * ratio)) for dim in image.size)
+
+    try:
+        import cv2
+        import numpy as np
+    except ImportError:
+        return image.resize(new_size, Image.Resampling.LANCZOS)
+
+    if image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    resized = cv2.resize(np.asarray(image), new_size, interpolation=cv2.INTER_AREA)
+    return Image.fromarray(resized)
+
+
+def _make_date(year: int, month: int, day: int) -> Optional[date]:
+    """Build a date, returning None instead of raising for invalid parts."""
+    if 1 <= year <= 9999 and 1 <= month <= 12 and 1 <= day <= calendar.monthrange(year, month)[1]:
+        return date(year, month, day)
+    return None
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_due_date(value: str) -> Optional[date]:
+    """Parse a dots.ocr due_date string (ISO first, then DD/MM/YYYY, then MM/DD/YYYY)."""
+    match = _DUE_DATE_YMD_RE.match(value)
+    if match:
+        return _make_date(int(match.group(1)), int(match.group(3)), int(match.group(4)))
+
+    match = _DUE_DATE_DMY_RE.match(value)
+    if match:
+        first, second, year = (int(part) for part in match.groups())
+        return _make_date(year, second, first) or _make_date(year, first, second)
+
+    return None
+
+
+class ServiceUnavailable(RuntimeError):
+    """Raised when the OCR backend is still loading or failed to load."""
+
 
 class OCRService:
     """
@@ -24,20 +140,81 @@ class OCRService:
     Automatically selects the best available OCR backend.
     """
 
-    def __init__(self, confidence_threshold=0.6, backend=None):
+    # Square input size and batch size used for batched EasyOCR detection
+    EASYOCR_BATCH_SIDE = 1024
+    EASYOCR_BATCH_SIZE = 8
+    # Longest side passed to single-image EasyOCR detection
+    EASYOCR_MAX_SIDE = 2048
+    # LSTM engine only, single uniform block of text
+    TESSERACT_CONFIG = '--oem 1 --psm 6'
+    # Channels per pixel for the raw formats accepted by extract_tasks_from_bytes
+    PIXEL_FORMAT_CHANNELS = {'L': 1, 'RGB': 3, 'RGBA': 4}
+    # Token budget for one dots.ocr answer; the JSON-array stopping criterion
+    # ends generation early on short notes. Images are downscaled to at most
+    # 1024px before generation, so a single fixed budget covers every input
+    DOTS_OCR_MAX_NEW_TOKENS = 512
+    # Seconds extraction waits for a prewarming backend before giving up
+    READY_TIMEOUT = 30
+
+    def __init__(self, confidence_threshold=0.6, backend=None, lazy=False):
         """
         Initialize OCR service.
 
         Args:
             confidence_threshold: Minimum confidence score for accepting results
             backend: Force specific backend ('dots', 'easyocr', 'tesseract', or None for auto)
+            lazy: Skip loading the backend; call prewarm() to load it in the background
         """
         self.confidence_threshold = confidence_threshold
         self.backend = backend or os.getenv('OCR_BACKEND', 'auto')
         self.ocr_engine = None
+        self._ready = threading.Event()
+        self._init_error = None
+        self._prewarm_thread = None
 
-        # Initialize the appropriate OCR backend
-        self._initialize_backend()
+        # LRU of results keyed by image digest; OCR_CACHE_SIZE=0 disables it
+        self.cache_size = int(os.getenv('OCR_CACHE_SIZE', '128'))
+        self._result_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+        if not lazy:
+            # Initialize the appropriate OCR backend
+            self._initialize_backend()
+            self._ready.set()
+
+    def prewarm(self):
+        """
+        Load the backend in a daemon thread so callers are not blocked.
+
+        Extraction calls wait for the load to finish (up to READY_TIMEOUT)
+        and raise ServiceUnavailable if it is still running or failed.
+        """
+        if self._ready.is_set() or self._prewarm_thread is not None:
+            return
+
+        self._prewarm_thread = threading.Thread(
+            target=self._prewarm,
+            name='ocr-prewarm',
+            daemon=True,
+        )
+        self._prewarm_thread.start()
+
+    def _prewarm(self):
+        """Thread target: initialize the backend and flag readiness."""
+        try:
+            self._initialize_backend()
+        except Exception as e:
+            logger.error(f"Background OCR backend initialization failed: {e}")
+            self._init_error = e
+        finally:
+            self._ready.set()
+
+    def _wait_until_ready(self):
+        """Block until the backend is loaded, or raise ServiceUnavailable."""
+        if not self._ready.wait(self.READY_TIMEOUT):
+            raise ServiceUnavailable("OCR backend is still loading")
+        if self._init_error is not None:
+            raise ServiceUnavailable(f"OCR backend failed to load: {self._init_error}")
 
     def _initialize_backend(self):
         """Initialize the OCR backend."""
@@ -82,46 +259,62 @@ class OCRService:
             gpu_available = torch.cuda.is_available()
 
             if gpu_available:
-                # GPU: Load with bfloat16 (matches model's default dtype)
-                logger.info("Loading dots.ocr on GPU with bfloat16...")
-
-                # Use bfloat16 which is the model's native dtype
-                model = AutoModelForCausalLM.from_pretrained(
+                # TF32 matmuls and autotuned cuDNN kernels for the fixed input shapes
+                torch.backends.cuda.matmul.allow_tf32 = True
+                torch.backends.cudnn.allow_tf32 = True
+                torch.backends.cudnn.benchmark = True
+
+                # GPU: quantized weights (DOTS_OCR_QUANT) or bfloat16
+                load_kwargs, quant = self._dots_ocr_quantization(torch)
+                logger.info(f"Loading dots.ocr on GPU with {quant}...")
+                model = self._load_dots_ocr_model(
+                    AutoModelForCausalLM,
                     model_path,
-                    torch_dtype=torch.bfloat16,
+                    os.getenv('DOTS_OCR_ATTN', 'flash_attention_2'),
                     device_map="auto",
                     trust_remote_code=True,
+                    **load_kwargs,
                 )
-
-                self.ocr_engine = {
-                    'type': 'dots',
-                    'model': model,
-                    'processor': AutoProcessor.from_pretrained(
-                        model_path,
-                        trust_remote_code=True
-                    )
-                }
-                logger.info("dots.ocr initialized successfully on GPU with bfloat16")
-
-            if not gpu_available:
+            else:
                 # CPU: Load with float32 to avoid dtype mismatches
+                quant = 'float32'
                 logger.info("Loading dots.ocr on CPU with float32...")
-                model = AutoModelForCausalLM.from_pretrained(
+                # FlashAttention-2 is CUDA-only
+                model = self._load_dots_ocr_model(
+                    AutoModelForCausalLM,
                     model_path,
+                    os.getenv('DOTS_OCR_ATTN', 'sdpa'),
                     torch_dtype=torch.float32,
                     device_map="cpu",
                     trust_remote_code=True,
                 )
 
-                self.ocr_engine = {
-                    'type': 'dots',
-                    'model': model,
-                    'processor': AutoProcessor.from_pretrained(
-                        model_path,
-                        trust_remote_code=True
-                    )
-                }
-                logger.info("dots.ocr initialized successfully on CPU with float32")
+            if gpu_available and quant == 'bf16':
+                # NHWC conv weights for the vision tower; quantized weights stay put
+                try:
+                    model = model.to(memory_format=torch.channels_last)
+                except (RuntimeError, ValueError) as e:
+                    logger.info(f"Keeping default memory format for dots.ocr: {e}")
+
+            processor = AutoProcessor.from_pretrained(
+                model_path,
+                trust_remote_code=True
+            )
+            static_cache = gpu_available and self._enable_dots_ocr_static_cache(
+                model, processor.tokenizer, torch
+            )
+
+            self.ocr_engine = {
+                'type': 'dots',
+                'model': model,
+                'processor': processor,
+                'quant': quant,
+                'static_cache': static_cache,
+            }
+            logger.info(
+                f"dots.ocr initialized successfully on "
+                f"{'GPU' if gpu_available else 'CPU'} with {quant}"
+            )
 
             return True
         except ImportError:
@@ -131,6 +324,200 @@ class OCRService:
             logger.warning(f"Failed to initialize dots.ocr: {e}")
             return False
 
+    def _load_dots_ocr_model(self, model_cls, model_path, attn_implementation, **kwargs):
+        """
+        Load the dots.ocr model with the requested attention backend.
+
+        Falls back to PyTorch SDPA when the requested kernel (typically
+        flash_attention_2 without the flash-attn package) is unavailable.
+        """
+        try:
+            model = model_cls.from_pretrained(
+                model_path,
+                attn_implementation=attn_implementation,
+                **kwargs,
+            )
+        except (ImportError, ValueError) as e:
+            if attn_implementation == 'sdpa':
+                raise
+            logger.warning(
+                f"Attention backend '{attn_implementation}' unavailable ({e}), falling back to sdpa"
+            )
+            attn_implementation = 'sdpa'
+            model = model_cls.from_pretrained(
+                model_path,
+                attn_implementation=attn_implementation,
+                **kwargs,
+            )
+
+        logger.info(f"dots.ocr using {attn_implementation} attention")
+        return model
+
+    def _dots_ocr_quantization(self, torch):
+        """
+        Build from_pretrained kwargs for the GPU weight format.
+
+        DOTS_OCR_QUANT selects 'nf4' (default), 'int8' or 'bf16'. Quantized
+        modes need bitsandbytes and fall back to bf16 when it is missing.
+
+        Returns:
+            Tuple of (from_pretrained kwargs, chosen mode)
+        """
+        quant = os.getenv('DOTS_OCR_QUANT', 'nf4').lower()
+
+        if quant in ('nf4', 'int8'):
+            try:
+                import bitsandbytes  # noqa: F401
+                from transformers import BitsAndBytesConfig
+            except ImportError:
+                logger.warning(
+                    f"bitsandbytes not available, loading dots.ocr with bf16 instead of {quant}"
+                )
+            else:
+                if quant == 'nf4':
+                    bnb_config = BitsAndBytesConfig(
+                        load_in_4bit=True,
+                        bnb_4bit_quant_type="nf4",
+                        bnb_4bit_compute_dtype=torch.bfloat16,
+                        bnb_4bit_use_double_quant=True,
+                    )
+                else:
+                    bnb_config = BitsAndBytesConfig(load_in_8bit=True)
+                return {
+                    'quantization_config': bnb_config,
+                    'torch_dtype': torch.bfloat16,
+                }, quant
+        elif quant != 'bf16':
+            logger.warning(f"Unknown DOTS_OCR_QUANT '{quant}', using bf16")
+
+        # bfloat16 is the model's native dtype
+        return {'torch_dtype': torch.bfloat16}, 'bf16'
+
+    def _enable_dots_ocr_static_cache(self, model, tokenizer, torch) -> bool:
+        """
+        Switch generation to a static KV cache and compile the forward pass.
+
+        A fixed-shape cache lets torch.compile capture the decode step once
+        (CUDA graphs via mode="reduce-overhead") instead of re-launching
+        every kernel per token. Disabled with DOTS_OCR_COMPILE=0.
+
+        torch.compile only traces on the first call, so a short warmup
+        generation runs here; if it fails the original forward pass and the
+        dynamic cache are restored. Quantized (bitsandbytes) models are
+        skipped, their kernels do not trace.
+
+        Returns:
+            True if static cache generation is enabled
+        """
+        if os.getenv('DOTS_OCR_COMPILE', '1').lower() in ('0', 'false', 'no'):
+            return False
+
+        if getattr(model, 'is_quantized', False):
+            logger.info("dots.ocr model is quantized, skipping torch.compile")
+            return False
+
+        if not getattr(model, '_supports_static_cache', False):
+            logger.info("dots.ocr model does not support a static cache, using dynamic cache")
+            return False
+
+        original_forward = model.forward
+        try:
+            model.generation_config.cache_implementation = "static"
+            model.forward = torch.compile(model.forward, mode="reduce-overhead", fullgraph=False)
+
+            token_id = tokenizer.bos_token_id
+            if token_id is None:
+                token_id = tokenizer.eos_token_id
+            input_ids = torch.tensor([[token_id]], device=model.device)
+            with torch.inference_mode():
+                model.generate(
+                    input_ids=input_ids,
+                    attention_mask=torch.ones_like(input_ids),
+                    max_new_tokens=2,
+                    do_sample=False,
+                    pad_token_id=tokenizer.eos_token_id,
+                )
+        except Exception as e:
+            logger.warning(f"Failed to compile dots.ocr forward pass: {e}")
+            model.forward = original_forward
+            model.generation_config.cache_implementation = None
+            return False
+
+        logger.info("dots.ocr using static KV cache with compiled forward pass")
+        return True
+
+    def _pad_to_bucket(self, inputs, pad_token_id, torch):
+        """
+        Left-pad the prompt to the next power-of-two length.
+
+        The static cache and compiled graphs are specialised on the prompt
+        length, so bucketing keeps the shapes stable across calls and
+        avoids a recompile for every slightly different image.
+        """
+        length = inputs['input_ids'].shape[-1]
+        bucket = 1 << (length - 1).bit_length()
+        pad = bucket - length
+        if pad == 0:
+            return inputs
+
+        batch = inputs['input_ids'].shape[0]
+        inputs['input_ids'] = torch.cat([
+            inputs['input_ids'].new_full((batch, pad), pad_token_id),
+            inputs['input_ids'],
+        ], dim=-1)
+        inputs['attention_mask'] = torch.cat([
+            inputs['attention_mask'].new_zeros((batch, pad)),
+            inputs['attention_mask'],
+        ], dim=-1)
+        return inputs
+
+    def _json_array_stopping_criteria(self, tokenizer, torch):
+        """
+        Stop generation as soon as the top-level JSON array is closed.
+
+        Tracks bracket depth over the decoded tokens, ignoring brackets
+        inside JSON strings, so the model does not keep generating after
+        the answer is complete.
+        """
+        from transformers import StoppingCriteria, StoppingCriteriaList
+
+        class JsonArrayClose(StoppingCriteria):
+            def __init__(self):
+                self.depth = 0
+                self.started = False
+                self.in_string = False
+                self.escaped = False
+                self.done = False
+
+            def __call__(self, input_ids, scores, **kwargs):
+                if not self.done:
+                    self.feed(tokenizer.decode(input_ids[0, -1:]))
+                return torch.full(
+                    (input_ids.shape[0],), self.done, dtype=torch.bool, device=input_ids.device
+                )
+
+            def feed(self, piece):
+                for char in piece:
+                    if self.in_string:
+                        if self.escaped:
+                            self.escaped = False
+                        elif char == '\\':
+                            self.escaped = True
+                        elif char == '"':
+                            self.in_string = False
+                    elif char == '"':
+                        self.in_string = self.started
+                    elif char in '[{':
+                        self.depth += 1
+                        self.started = True
+                    elif char in ']}' and self.started:
+                        self.depth -= 1
+                        if self.depth == 0:
+                            self.done = True
+                            return
+
+        return StoppingCriteriaList([JsonArrayClose()])
+
     def _try_init_easyocr(self) -> bool:
         """Try to initialize EasyOCR backend."""
         try:
@@ -141,9 +528,17 @@ class OCRService:
             gpu_available = torch.cuda.is_available()
             logger.info(f"Initializing EasyOCR with GPU: {gpu_available}...")
 
+            reader = easyocr.Reader(
+                ['en'],
+                gpu=gpu_available,
+                cudnn_benchmark=gpu_available,
+            )
+            if gpu_available:
+                self._warmup_easyocr(reader)
+
             self.ocr_engine = {
                 'type': 'easyocr',
-                'reader': easyocr.Reader(['en'], gpu=gpu_available)
+                'reader': reader
             }
             logger.info(f"EasyOCR initialized successfully (GPU: {gpu_available})")
             return True
@@ -154,8 +549,28 @@ class OCRService:
             logger.warning(f"Failed to initialize EasyOCR: {e}")
             return False
 
+    def _warmup_easyocr(self, reader):
+        """Run one blank batch so cuDNN selects its conv algorithms up front."""
+        import numpy as np
+
+        side = self.EASYOCR_BATCH_SIDE
+        batch_size = self.EASYOCR_BATCH_SIZE
+        try:
+            reader.readtext_batched(
+                np.zeros((batch_size, side, side, 3), dtype=np.uint8),
+                batch_size=batch_size,
+            )
+        except Exception as e:
+            logger.warning(f"EasyOCR warmup failed: {e}")
+
     def _try_init_tesseract(self) -> bool:
         """Try to initialize Tesseract backend."""
+        api = self._try_init_tesserocr()
+        if api is not None:
+            self.ocr_engine = {'type': 'tesseract', 'api': api, 'lock': threading.Lock()}
+            logger.info("Tesseract initialized successfully (in-process tesserocr)")
+            return True
+
         try:
             import pytesseract
             # Test if tesseract is available
@@ -170,16 +585,95 @@ class OCRService:
             logger.warning(f"Failed to initialize Tesseract: {e}")
             return False
 
-    def extract_tasks(self, image: Image.Image) -> Dict[str, Any]:
+    def _try_init_tesserocr(self):
+        """
+        Load Tesseract in-process through tesserocr, if it is installed.
+
+        Keeps the LSTM model resident instead of spawning the tesseract
+        binary for every image.
+
+        Returns:
+            PyTessBaseAPI instance, or None to use the pytesseract subprocess
+        """
+        try:
+            import tesserocr
+        except ImportError:
+            logger.debug("tesserocr not available, using pytesseract")
+            return None
+
+        try:
+            return tesserocr.PyTessBaseAPI(
+                oem=tesserocr.OEM.LSTM_ONLY,
+                psm=tesserocr.PSM.SINGLE_BLOCK,
+            )
+        except Exception as e:
+            logger.warning(f"Failed to initialize tesserocr, using pytesseract: {e}")
+            return None
+
+    def extract_tasks(self, image, use_cache: bool = True) -> Dict[str, Any]:
         """
         Extract tasks from handwritten notes image.
 
         Args:
-            image: PIL Image object
+            image: PIL Image object, an HxW(xC) uint8 pixel array, or encoded
+                image data as bytes or a binary file-like object
+            use_cache: Serve and store results in the per-process result
+                cache; False always runs OCR
 
         Returns:
             Dictionary containing extracted tasks and metadata
+
+        Raises:
+            TypeError: If the image type is not supported
         """
+        import numpy as np
+
+        if isinstance(image, np.ndarray):
+            return self.extract_tasks_from_array(image, use_cache=use_cache)
+        if isinstance(image, (bytes, bytearray)):
+            image = Image.open(io.BytesIO(image))
+        elif not isinstance(image, Image.Image) and hasattr(image, 'read'):
+            image = Image.open(image)
+        if not isinstance(image, Image.Image):
+            raise TypeError(f"Unsupported image type: {type(image).__name__}")
+
+        self._wait_until_ready()
+
+        if self.cache_size <= 0 or not use_cache:
+            return self._extract(image)
+
+        key = self._image_digest(image)
+        with self._cache_lock:
+            cached = self._result_cache.get(key)
+            if cached is not None:
+                self._result_cache.move_to_end(key)
+                logger.info("Returning cached OCR result for identical image")
+                return copy.deepcopy(cached)
+
+        result = self._extract(image)
+
+        with self._cache_lock:
+            self._result_cache[key] = copy.deepcopy(result)
+            while len(self._result_cache) > self.cache_size:
+                self._result_cache.popitem(last=False)
+
+        return result
+
+    def _image_digest(self, image: Image.Image) -> bytes:
+        """
+        Exact content digest of an image's pixels.
+
+        A perceptual hash would also match near-duplicates, but two notes
+        that differ only in a few handwritten words hash alike, so only
+        identical pixels may share a cached result.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f'{image.mode}:{image.size[0]}x{image.size[1]}'.encode())
+        digest.update(image.tobytes())
+        return digest.digest()
+
+    def _extract(self, image: Image.Image) -> Dict[str, Any]:
+        """Run the configured backend on a PIL image."""
         logger.info(f"Processing image with {self.backend} backend")
 
         if self.backend == 'dots':
@@ -192,6 +686,74 @@ class OCRService:
             # Fallback to mock
             return self._mock_extract_tasks(image)
 
+    def extract_tasks_from_bytes(self, buf: bytes, fmt: str, width: int, height: int) -> Dict[str, Any]:
+        """
+        Extract tasks from raw, already decoded pixel data.
+
+        The buffer is viewed as an array without copying, so callers that
+        decode images themselves avoid the PIL round trip.
+
+        Args:
+            buf: Packed 8-bit pixels, row-major
+            fmt: Pixel layout as a PIL mode ('RGB', 'RGBA' or 'L')
+            width: Image width in pixels
+            height: Image height in pixels
+
+        Returns:
+            Dictionary containing extracted tasks and metadata
+        """
+        import numpy as np
+
+        channels = self.PIXEL_FORMAT_CHANNELS.get(fmt)
+        if channels is None:
+            raise ValueError(f"Unsupported pixel format: {fmt}")
+
+        shape = (height, width) if channels == 1 else (height, width, channels)
+        return self.extract_tasks_from_array(np.frombuffer(buf, dtype=np.uint8).reshape(shape))
+
+    def extract_tasks_from_array(self, img_array, use_cache: bool = True) -> Dict[str, Any]:
+        """
+        Extract tasks from a decoded HxW(xC) uint8 pixel array.
+
+        EasyOCR reads the array directly; the other backends (and images
+        that need downscaling first) get a PIL Image built from it.
+
+        Args:
+            img_array: NumPy array of RGB(A) or grayscale pixels
+            use_cache: Passed on to extract_tasks
+
+        Returns:
+            Dictionary containing extracted tasks and metadata
+        """
+        self._wait_until_ready()
+        height, width = img_array.shape[:2]
+
+        if self.backend == 'easyocr' and max(width, height) <= self.EASYOCR_MAX_SIDE:
+            logger.info(f"Processing pixel array with {self.backend} backend")
+            return self._extract_array_with_easyocr(img_array, (width, height))
+
+        return self.extract_tasks(Image.fromarray(img_array), use_cache=use_cache)
+
+    def extract_tasks_batch(self, images: List[Image.Image]) -> List[Dict[str, Any]]:
+        """
+        Extract tasks from several handwritten notes images.
+
+        EasyOCR detects text for the whole batch in a single pass; the other
+        backends process the images one at a time.
+
+        Args:
+            images: List of PIL Image objects
+
+        Returns:
+            List of dictionaries as returned by extract_tasks, in input order
+        """
+        self._wait_until_ready()
+        if self.backend != 'easyocr':
+            return [self.extract_tasks(image) for image in images]
+
+        logger.info(f"Processing batch of {len(images)} images with easyocr backend")
+        return self._extract_batch_with_easyocr(images)
+
     def _extract_with_dots_ocr(self, image: Image.Image) -> Dict[str, Any]:
         """Extract tasks using dots.ocr."""
         import torch
@@ -200,10 +762,8 @@ class OCRService:
         # Resize image if too large to reduce memory usage
         max_size = 1024
         if max(image.size) > max_size:
-            ratio = max_size / max(image.size)
-            new_size = tuple(int(dim * ratio) for dim in image.size)
-            image = image.resize(new_size, Image.Resampling.LANCZOS)
-            logger.info(f"Resized image to {new_size} to reduce memory usage")
+            image = _downscale(image, max_size)
+            logger.info(f"Resized image to {image.size} to reduce memory usage")
 
         # Prepare prompt for task extraction
         prompt = """Extract all tasks from this handwritten note. For each task, identify:
@@ -241,14 +801,26 @@ Format the output as a structured list with bounding boxes."""
             padding=True,
             return_tensors="pt"
         )
+        tokenizer = processor.tokenizer
+        pad_token_id = tokenizer.pad_token_id
+        if pad_token_id is None:
+            pad_token_id = tokenizer.eos_token_id
+
+        generate_kwargs = {}
+        if self.ocr_engine.get('static_cache'):
+            inputs = self._pad_to_bucket(inputs, pad_token_id, torch)
+            generate_kwargs['cache_implementation'] = "static"
         inputs = inputs.to(model.device)
 
-        with torch.no_grad():
+        with torch.inference_mode():
             generated_ids = model.generate(
                 **inputs,
-                max_new_tokens=512,
+                max_new_tokens=self.DOTS_OCR_MAX_NEW_TOKENS,
                 do_sample=False,
-                use_cache=True
+                use_cache=True,
+                pad_token_id=pad_token_id,
+                stopping_criteria=self._json_array_stopping_criteria(tokenizer, torch),
+                **generate_kwargs
             )
 
         generated_ids_trimmed = [
@@ -263,7 +835,7 @@ Format the output as a structured list with bounding boxes."""
         )[0]
 
         # Log raw output for debugging
-        logger.info(f"dots.ocr raw output: {output_text}")
+        logger.debug("dots.ocr raw output: %s", output_text)
 
         # Parse the structured output
         tasks = self._parse_dots_ocr_output(output_text, image.size)
@@ -279,36 +851,90 @@ Format the output as a structured list with bounding boxes."""
         """Extract tasks using EasyOCR."""
         import numpy as np
 
+        # Detect on a downscaled copy of very large photos
+        scaled = _downscale(image, self.EASYOCR_MAX_SIDE)
+
         # Convert PIL Image to numpy array
-        img_array = np.array(image)
+        return self._extract_array_with_easyocr(np.array(scaled), image.size)
 
+    def _extract_array_with_easyocr(self, img_array, image_size: tuple) -> Dict[str, Any]:
+        """Run EasyOCR on a pixel array, reporting boxes in image_size coordinates."""
         # Perform OCR
         reader = self.ocr_engine['reader']
         results = reader.readtext(img_array)
 
+        height, width = img_array.shape[:2]
+        if (width, height) != tuple(image_size):
+            # Map boxes back to the original image
+            scale_x = image_size[0] / width
+            scale_y = image_size[1] / height
+            results = [
+                ([[x * scale_x, y * scale_y] for x, y in bbox], text, conf)
+                for bbox, text, conf in results
+            ]
+
         # Log raw OCR results for debugging
         logger.info(f"EasyOCR detected {len(results)} text regions")
-        for i, (bbox, text, conf) in enumerate(results):
-            logger.info(f"OCR result {i}: text='{text}', confidence={conf:.2f}")
+        if logger.isEnabledFor(logging.DEBUG):
+            for i, (bbox, text, conf) in enumerate(results):
+                logger.debug("OCR result %d: text=%r, confidence=%.2f", i, text, conf)
 
         # Parse results into tasks
-        tasks = self._parse_ocr_results(results, image.size)
+        tasks = self._parse_ocr_results(results, image_size)
 
         return {
             'tasks': tasks,
-            'image_size': {'width': image.size[0], 'height': image.size[1]},
+            'image_size': {'width': image_size[0], 'height': image_size[1]},
             'processing_method': 'easyocr',
         }
 
+    def _extract_batch_with_easyocr(self, images: List[Image.Image]) -> List[Dict[str, Any]]:
+        """Extract tasks from a batch of images using EasyOCR."""
+        import numpy as np
+
+        side = self.EASYOCR_BATCH_SIDE
+        reader = self.ocr_engine['reader']
+
+        # Every image is resized to side x side so detection runs as one tensor
+        batch_results = reader.readtext_batched(
+            [np.asarray(image) for image in images],
+            n_width=side,
+            n_height=side,
+            batch_size=self.EASYOCR_BATCH_SIZE,
+        )
+
+        outputs = []
+        for image, results in zip(images, batch_results):
+            # Map boxes from the resized batch back to the original image
+            scale_x = image.size[0] / side
+            scale_y = image.size[1] / side
+            results = [
+                ([[x * scale_x, y * scale_y] for x, y in bbox], text, conf)
+                for bbox, text, conf in results
+            ]
+            logger.info(f"EasyOCR detected {len(results)} text regions")
+
+            outputs.append({
+                'tasks': self._parse_ocr_results(results, image.size),
+                'image_size': {'width': image.size[0], 'height': image.size[1]},
+                'processing_method': 'easyocr',
+            })
+
+        return outputs
+
     def _extract_with_tesseract(self, image: Image.Image) -> Dict[str, Any]:
         """Extract tasks using Tesseract OCR."""
-        import pytesseract
+        if 'api' in self.ocr_engine:
+            data = self._tesserocr_words(image)
+        else:
+            import pytesseract
 
-        # Get detailed OCR data
-        data = pytesseract.image_to_data(
-            image,
-            output_type=pytesseract.Output.DICT
-        )
+            # Get detailed OCR data
+            data = pytesseract.image_to_data(
+                image,
+                config=self.TESSERACT_CONFIG,
+                output_type=pytesseract.Output.DICT
+            )
 
         # Parse results into tasks
         tasks = self._parse_tesseract_results(data, image.size)
@@ -319,17 +945,37 @@ Format the output as a structured list with bounding boxes."""
             'processing_method': 'tesseract',
         }
 
+    def _tesserocr_words(self, image: Image.Image) -> Dict[str, List]:
+        """Recognize words with tesserocr, shaped like pytesseract's image_to_data dict."""
+        from tesserocr import RIL, iterate_level
+
+        data = {'text': [], 'conf': [], 'top': [], 'left': []}
+        api = self.ocr_engine['api']
+
+        # PyTessBaseAPI holds per-image state and is not thread-safe
+        with self.ocr_engine['lock']:
+            api.SetImage(image)
+            api.Recognize()
+            for word in iterate_level(api.GetIterator(), RIL.WORD):
+                text = word.GetUTF8Text(RIL.WORD)
+                box = word.BoundingBox(RIL.WORD)
+                if text is None or box is None:
+                    continue
+                data['text'].append(text)
+                data['conf'].append(word.Confidence(RIL.WORD))
+                data['left'].append(box[0])
+                data['top'].append(box[1])
+
+        return data
+
     def _parse_dots_ocr_output(self, output_text: str, image_size: tuple) -> List[Dict[str, Any]]:
         """Parse dots.ocr JSON output into tasks."""
-        import json
-        from datetime import datetime
-
         tasks = []
         position_index = 0
 
         try:
             # Parse JSON output from the model
-            ocr_items = json.loads(output_text)
+            ocr_items = _loads(_JSON_FENCE_RE.sub('', output_text))
 
             # Ensure it's a list
             if not isinstance(ocr_items, list):
@@ -350,17 +996,7 @@ Format the output as a structured list with bounding boxes."""
                     due_date = None
                     due_date_str = item.get('due_date', '').strip()
                     if due_date_str and due_date_str != "null":
-                        try:
-                            # Try to parse the date
-                            due_date = datetime.strptime(due_date_str, '%Y-%m-%d').date()
-                        except ValueError:
-                            # Try alternative formats
-                            for fmt in ['%d/%m/%Y', '%m/%d/%Y', '%Y/%m/%d']:
-                                try:
-                                    due_date = datetime.strptime(due_date_str, fmt).date()
-                                    break
-                                except ValueError:
-                                    continue
+                        due_date = _parse_due_date(due_date_str)
 
                     # Extract bbox
                     bbox_data = item.get('bbox', [0, 0, 0, 0])
@@ -376,7 +1012,7 @@ Format the output as a structured list with bounding boxes."""
                     text = item.get('text', '')
 
                     # Remove bullet markers
-                    clean_text = re.sub(r'^[\-\*\•\d]+[\.\)]?\s*', '', text)
+                    clean_text = _BULLET_RE.sub('', text)
 
                     # Extract assignee first
                     assignee = self._extract_assignee(clean_text)
@@ -388,7 +1024,7 @@ Format the output as a structured list with bounding boxes."""
                     due_date = self._extract_date(clean_text)
                     if due_date:
                         # Remove date patterns from task name
-                        task_name = re.sub(r'\s+\d{1,2}[/\-\.]\d{1,2}[/\-\.]\d{2,4}', '', task_name)
+                        task_name = _INLINE_DATE_RE.sub('', task_name)
 
                     description = ''
                     priority = self._extract_priority(clean_text)
@@ -418,7 +1054,7 @@ Format the output as a structured list with bounding boxes."""
                     })
                     position_index += 1
 
-        except (json.JSONDecodeError, ValueError) as e:
+        except ValueError as e:  # orjson and json decode errors both subclass ValueError
             logger.warning(f"Failed to parse dots.ocr JSON output: {e}")
             logger.warning(f"Raw output was: {output_text}")
             # Fallback to empty list
@@ -428,35 +1064,32 @@ Format the output as a structured list with bounding boxes."""
 
     def _parse_ocr_results(self, results: List, image_size: tuple) -> List[Dict[str, Any]]:
         """Parse EasyOCR results into structured tasks."""
-        # Group text by vertical position
-        lines = []
-        for bbox, text, conf in results:
-            y_center = (bbox[0][1] + bbox[2][1]) / 2
-            lines.append({
-                'text': text,
-                'y': y_center,
-                'bbox': bbox,
-                'confidence': conf
-            })
+        import numpy as np
 
-        # Sort by Y position
-        lines.sort(key=lambda x: x['y'])
+        # Sort by Y position (vertical center of each box)
+        y_centers = np.fromiter(
+            ((bbox[0][1] + bbox[2][1]) / 2 for bbox, _, _ in results),
+            dtype=np.float64,
+            count=len(results),
+        )
+        order = np.argsort(y_centers, kind='stable')
 
         # Group into tasks
         tasks = []
         current_task = None
         position_index = 0
 
-        for line in lines:
-            text = line['text'].strip()
+        for idx in order:
+            bbox, text, conf = results[idx]
+            text = text.strip()
 
             # Check if this starts a new task
             # Match bullets/numbers optionally followed by . or ), then whitespace
-            if re.match(r'^[\-\*\•\d]+[\.\)]?\s+', text) or any(marker in text.lower() for marker in ['todo', 'task', '☐', '□']):
+            if _BULLET_START_RE.match(text) or any(marker in text.lower() for marker in _TASK_MARKERS):
                 if current_task:
                     tasks.append(current_task)
 
-                task_name = re.sub(r'^[\-\*\•\d]+[\.\)]?\s*', '', text)
+                task_name = _BULLET_RE.sub('', text)
                 current_task = {
                     'name': task_name,
                     'description': '',
@@ -464,12 +1097,12 @@ Format the output as a structured list with bounding boxes."""
                     'due_date': self._extract_date(text),
                     'priority': self._extract_priority(text),
                     'position_index': position_index,
-                    'confidence': line['confidence'],
+                    'confidence': conf,
                     'bbox': {
-                        'x': int(line['bbox'][0][0]),
-                        'y': int(line['bbox'][0][1]),
-                        'width': int(line['bbox'][2][0] - line['bbox'][0][0]),
-                        'height': int(line['bbox'][2][1] - line['bbox'][0][1])
+                        'x': int(bbox[0][0]),
+                        'y': int(bbox[0][1]),
+                        'width': int(bbox[2][0] - bbox[0][0]),
+                        'height': int(bbox[2][1] - bbox[0][1])
                     }
                 }
                 position_index += 1
@@ -485,31 +1118,35 @@ Format the output as a structured list with bounding boxes."""
 
     def _parse_tesseract_results(self, data: Dict, image_size: tuple) -> List[Dict[str, Any]]:
         """Parse Tesseract OCR data into structured tasks."""
+        import numpy as np
+
         # Combine words into lines
+        confs = np.asarray(data['conf'], dtype=np.float64).astype(np.int32)
+        kept = np.flatnonzero(confs >= 0)  # Skip low confidence
         lines = []
-        current_line = {'text': '', 'y': 0, 'x': 0, 'conf': 0, 'count': 0}
 
-        for i, text in enumerate(data['text']):
-            if int(data['conf'][i]) < 0:  # Skip low confidence
-                continue
-
-            y = data['top'][i]
-            x = data['left'][i]
-
-            # New line if Y position changes significantly
-            if current_line['count'] > 0 and abs(y - current_line['y']) > 20:
-                lines.append(current_line)
-                current_line = {'text': '', 'y': y, 'x': x, 'conf': 0, 'count': 0}
-
-            if current_line['text']:
-                current_line['text'] += ' '
-            current_line['text'] += text.strip()
-            current_line['y'] = y
-            current_line['conf'] += int(data['conf'][i])
-            current_line['count'] += 1
-
-        if current_line['count'] > 0:
-            lines.append(current_line)
+        if kept.size:
+            confs = confs[kept]
+            tops = np.asarray(data['top'], dtype=np.int32)[kept]
+
+            # New line where the Y position changes significantly
+            starts = np.flatnonzero(np.concatenate(([True], np.abs(np.diff(tops)) > 20)))
+            bounds = np.append(starts, kept.size)
+            conf_sums = np.add.reduceat(confs, starts)
+            counts = np.diff(bounds)
+
+            words = [data['text'][i].strip() for i in kept]
+            nonempty = [bool(w) for w in words]
+            for n in range(starts.size):
+                # Empty words before the first real word are dropped, later
+                # ones still add a separator (as the per-word loop did)
+                start, end = bounds[n], bounds[n + 1]
+                first = next((i for i in range(start, end) if nonempty[i]), end)
+                lines.append({
+                    'text': ' '.join(words[first:end]),
+                    'conf': int(conf_sums[n]),
+                    'count': int(counts[n]),
+                })
 
         # Parse lines into tasks
         tasks = []
@@ -521,8 +1158,8 @@ Format the output as a structured list with bounding boxes."""
                 continue
 
             # Check for task markers
-            if re.match(r'^[\-\*\•\d]+[\.\)]\s+', text):
-                task_name = re.sub(r'^[\-\*\•\d]+[\.\)]\s*', '', text)
+            if _NUMBERED_BULLET_START_RE.match(text):
+                task_name = _NUMBERED_BULLET_RE.sub('', text)
                 avg_conf = line['conf'] / line['count'] / 100 if line['count'] > 0 else 0.5
 
                 tasks.append({
@@ -543,11 +1180,11 @@ Format the output as a structured list with bounding boxes."""
         """Extract priority from text patterns."""
         text_lower = text.lower()
 
-        if any(marker in text_lower for marker in ['urgent', '!!!', 'asap', 'critical', 'high priority']):
+        if any(marker in text_lower for marker in _URGENT_MARKERS):
             return 'urgent'
-        elif any(marker in text_lower for marker in ['high', '!!', 'important']):
+        elif any(marker in text_lower for marker in _HIGH_MARKERS):
             return 'high'
-        elif any(marker in text_lower for marker in ['low', 'minor', 'whenever']):
+        elif any(marker in text_lower for marker in _LOW_MARKERS):
             return 'low'
         else:
             return 'medium'
@@ -556,33 +1193,29 @@ Format the output as a structured list with bounding boxes."""
         """Extract due date from text using pattern matching."""
         # Common date patterns
         date_patterns = [
-            (r'(\d{1,2})/(\d{1,2})/(\d{2,4})', lambda m: self._parse_date_parts(m.group(1), m.group(2), m.group(3))),
-            (r'(\d{4})-(\d{2})-(\d{2})', lambda m: datetime(int(m.group(1)), int(m.group(2)), int(m.group(3))).date()),
-            (r'(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]* (\d{1,2})', lambda m: self._parse_month_day(m.group(1), m.group(2))),
+            (_DATE_NUM_RE, lambda m: self._parse_date_parts(m.group(1), m.group(2), m.group(3))),
+            (_DATE_ISO_RE, lambda m: _make_date(int(m.group(1)), int(m.group(2)), int(m.group(3)))),
+            (_DATE_MON_RE, lambda m: self._parse_month_day(m.group(1), m.group(2))),
         ]
 
+        text_lower = text.lower()
         for pattern, parser in date_patterns:
-            match = re.search(pattern, text.lower())
+            match = pattern.search(text_lower)
             if match:
-                try:
-                    return parser(match)
-                except:
-                    pass
+                parsed = parser(match)
+                if parsed:
+                    return parsed
 
         return None
 
-    def _parse_date_parts(self, part1: str, part2: str, part3: str) -> datetime.date:
+    def _parse_date_parts(self, part1: str, part2: str, part3: str) -> Optional[datetime.date]:
         """Parse date from parts (handles MM/DD/YYYY or DD/MM/YYYY)."""
         year = int(part3)
         if year < 100:
             year += 2000
 
-        # Try MM/DD/YYYY first
-        try:
-            return datetime(year, int(part1), int(part2)).date()
-        except ValueError:
-            # Try DD/MM/YYYY
-            return datetime(year, int(part2), int(part1)).date()
+        # Try MM/DD/YYYY first, then DD/MM/YYYY
+        return _make_date(year, int(part1), int(part2)) or _make_date(year, int(part2), int(part1))
 
     def _parse_month_day(self, month_str: str, day: str) -> datetime.date:
         """Parse month name and day."""
@@ -592,29 +1225,19 @@ Format the output as a structured list with bounding boxes."""
         }
         month = months.get(month_str[:3].lower())
         if month:
-            year = datetime.now().year
-            return datetime(year, month, int(day)).date()
+            return _make_date(datetime.now().year, month, int(day))
         return None
 
     def _extract_assignee(self, text: str) -> Optional[str]:
         """Extract assignee from text patterns."""
-        patterns = [
-            r'[→>]\s*([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)',  # → Name or -> Name (arrow pattern, handles names like "Aykut" or "Hasan Smith")
-            r'@(\w+)',  # @username
-            r'assigned to:?\s*([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)',  # assigned to: Name
-            r'owner:?\s*([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)',  # owner: Name
-            r'\[([A-Z][a-z]+)\]',  # [Name]
-            r'\(([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)\)',  # (Name) in parentheses
-        ]
-
-        for pattern in patterns:
-            match = re.search(pattern, text)
+        for pattern in _ASSIGNEE_RES:
+            match = pattern.search(text)
             if match:
                 assignee = match.group(1).strip()
                 # Remove any trailing dates or numbers
-                assignee = re.sub(r'\s+\d{1,2}[/\-\.]\d{1,2}[/\-\.]\d{2,4}.*$', '', assignee)
+                assignee = _TRAILING_DATE_RE.sub('', assignee)
                 # Remove any trailing non-letter characters
-                assignee = re.sub(r'[^\w\s]+$', '', assignee).strip()
+                assignee = _TRAILING_PUNCTUATION_RE.sub('', assignee).strip()
                 if assignee:
                     return assignee
 
@@ -625,14 +1248,8 @@ Format the output as a structured list with bounding boxes."""
         if not assignee:
             return text
 
-        # Remove arrow patterns with assignee
-        text = re.sub(rf'\s*[→>]\s*{re.escape(assignee)}(?:\s+\d{{1,2}}[/\-\.]\d{{1,2}}[/\-\.]\d{{2,4}})?', '', text)
-        # Remove other assignee patterns
-        text = re.sub(rf'@{re.escape(assignee)}', '', text)
-        text = re.sub(rf'assigned to:?\s*{re.escape(assignee)}', '', text, flags=re.IGNORECASE)
-        text = re.sub(rf'owner:?\s*{re.escape(assignee)}', '', text, flags=re.IGNORECASE)
-        text = re.sub(rf'\[{re.escape(assignee)}\]', '', text)
-        text = re.sub(rf'\({re.escape(assignee)}\)', '', text)
+        for pattern in _assignee_removal_patterns(assignee):
+            text = pattern.sub('', text)
 
         return text.strip()
 
@@ -693,32 +1310,41 @@ Format the output as a structured list with bounding boxes."""
         }
 
 
-# Global singleton instance for reusing the loaded model
-_ocr_service_instance = None
+# Shared OCR service instances, keyed by (backend, confidence_threshold)
+_ocr_lock = threading.Lock()
+_ocr_instances: Dict[tuple, 'OCRService'] = {}
 
 
-def get_ocr_service(confidence_threshold=0.6, backend=None):
+def get_ocr_service(confidence_threshold=0.6, backend=None, preload=False):
     """
-    Get or create a singleton OCR service instance.
+    Get or create the shared OCR service instance for a configuration.
 
-    This ensures the model is loaded only once and reused across all requests,
-    preventing memory leaks and improving performance.
+    This ensures each model is loaded only once and reused across all requests,
+    preventing memory leaks and improving performance. Creation is guarded by
+    a lock so concurrent cold starts do not load the model twice.
 
     Args:
         confidence_threshold: Minimum confidence score for accepting results
         backend: Force specific backend ('dots', 'easyocr', 'tesseract', or None for auto)
+        preload: Return immediately and load the backend in a background thread
 
     Returns:
-        OCRService: Singleton instance of the OCR service
+        OCRService: Shared instance for (backend, confidence_threshold)
     """
-    global _ocr_service_instance
+    key = (backend or os.getenv('OCR_BACKEND', 'auto'), confidence_threshold)
+
+    if key not in _ocr_instances:
+        with _ocr_lock:
+            if key not in _ocr_instances:
+                logger.info(f"Initializing shared OCR service instance for {key}...")
+                _ocr_instances[key] = OCRService(
+                    confidence_threshold=confidence_threshold,
+                    backend=key[0],
+                    lazy=preload
+                )
+                logger.info("Shared OCR service instance created successfully")
 
-    if _ocr_service_instance is None:
-        logger.info("Initializing singleton OCR service instance...")
-        _ocr_service_instance = OCRService(
-            confidence_threshold=confidence_threshold,
-            backend=backend
-        )
-        logger.info("Singleton OCR service instance created successfully")
+    if preload:
+        _ocr_instances[key].prewarm()
 
-    return _ocr_service_instance
+    return _ocr_instances[key]
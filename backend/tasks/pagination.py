@@ -0,0 +1,14 @@
+"""
+Pagination classes for task OCR processing API.
+"""
+from rest_framework.pagination import CursorPagination
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    Keyset pagination over newest-first rows.
+
+    Pages seek on created_at instead of using OFFSET, so deep pages cost the
+    same as the first one; id breaks ties between equal timestamps.
+    """
+    ordering = ('-created_at', '-id')
@@ -0,0 +1,17 @@
+"""
+Parsers for task OCR processing API.
+"""
+import orjson
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+
+class ORJSONParser(JSONParser):
+    """JSON parser backed by orjson."""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """Parse the incoming UTF-8 JSON stream."""
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
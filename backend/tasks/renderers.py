@@ -0,0 +1,56 @@
+"""
+Renderers for task OCR processing API.
+"""
+import orjson
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSON renderer backed by orjson.
+
+    Falls back to the stock renderer when indented output is requested.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render data into compact UTF-8 JSON."""
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # DRF's encoder covers the types orjson does not (Decimal, lazy strings, ...);
+        # validation errors of list items are keyed by int index
+        return orjson.dumps(
+            data,
+            default=self.encoder_class().default,
+            option=orjson.OPT_NON_STR_KEYS,
+        )
+
+
+def sse_message(data, event=None):
+    """Encode data as one Server-Sent Events message with a JSON payload."""
+    message = ORJSONRenderer().render(data)
+    if event:
+        return b'event: ' + event.encode() + b'\ndata: ' + message + b'\n\n'
+    return b'data: ' + message + b'\n\n'
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Renderer for text/event-stream responses.
+
+    Streaming views write their own events; this renders anything else
+    (e.g. error responses) as a single message.
+    """
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render data as one SSE message."""
+        if data is None:
+            return b''
+        return sse_message(data)
@@ -1,12 +1,50 @@
 """
 Serializers for task OCR processing API.
 """
+from django.conf import settings
 from rest_framework import serializers
 from .models import ProcessingJob, ExtractedTask
 
+# Accepted upload formats - be flexible with content type detection
+ALLOWED_CONTENT_TYPES = frozenset(('image/jpeg', 'image/png', 'image/jpg', 'image/pjpeg'))
+ALLOWED_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+# Most jobs one batch status request may ask about
+MAX_BATCH_STATUS_IDS = 200
+# Most images one batch upload request may carry
+MAX_BATCH_UPLOAD_IMAGES = 20
+
+
+def validate_upload_image(value):
+    """Validate an uploaded image file (size and type)."""
+    # Check file size (10MB max)
+    max_size = settings.MAX_UPLOAD_SIZE
+    if value.size > max_size:
+        raise serializers.ValidationError(
+            f'Image file too large. Maximum size is {max_size / (1024*1024)}MB'
+        )
+
+    # Get file extension
+    file_name = value.name.lower() if hasattr(value, 'name') else ''
+    has_valid_extension = file_name.endswith(ALLOWED_EXTENSIONS)
+
+    # Accept if either content type OR extension is valid
+    if value.content_type not in ALLOWED_CONTENT_TYPES and not has_valid_extension:
+        raise serializers.ValidationError(
+            f'Invalid file type. Allowed types: JPEG, PNG. '
+            f'Received content-type: {value.content_type}'
+        )
+
+    return value
+
 
 class ExtractedTaskSerializer(serializers.ModelSerializer):
-    """Serializer for extracted tasks."""
+    """
+    Serializer for extracted tasks.
+
+    Bounding box fields are left out when the serializer context sets
+    include_bbox to False.
+    """
+    BBOX_FIELDS = ('bbox_x', 'bbox_y', 'bbox_width', 'bbox_height')
 
     class Meta:
         model = ExtractedTask
@@ -26,9 +64,25 @@ class ExtractedTaskSerializer(serializers.ModelSerializer):
             'created_at',
         ]
 
+    @classmethod
+    def field_names(cls, include_bbox=True):
+        """Model fields rendered by this serializer."""
+        if include_bbox:
+            return list(cls.Meta.fields)
+        return [name for name in cls.Meta.fields if name not in cls.BBOX_FIELDS]
+
+    def get_fields(self):
+        """Drop bounding box fields unless the context asks for them."""
+        fields = super().get_fields()
+        if not self.context.get('include_bbox', True):
+            for name in self.BBOX_FIELDS:
+                fields.pop(name, None)
+        return fields
+
 
 class ProcessingJobSerializer(serializers.ModelSerializer):
     """Serializer for processing jobs."""
+    status = serializers.CharField(source='status_name', read_only=True)
     extracted_tasks = ExtractedTaskSerializer(many=True, read_only=True)
 
     class Meta:
@@ -62,7 +116,8 @@ class ProcessingJobSerializer(serializers.ModelSerializer):
 
 class JobStatusSerializer(serializers.ModelSerializer):
     """Lightweight serializer for job status checks."""
-    task_count = serializers.SerializerMethodField()
+    status = serializers.CharField(source='status_name', read_only=True)
+    task_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = ProcessingJob
@@ -76,9 +131,15 @@ class JobStatusSerializer(serializers.ModelSerializer):
             'error_message',
         ]
 
-    def get_task_count(self, obj):
-        """Get count of extracted tasks."""
-        return obj.extracted_tasks.count()
+
+class BatchJobStatusSerializer(serializers.Serializer):
+    """Serializer for batch status requests."""
+    ids = serializers.ListField(
+        child=serializers.UUIDField(),
+        allow_empty=False,
+        max_length=MAX_BATCH_STATUS_IDS,
+        help_text='Transaction IDs of the jobs to look up'
+    )
 
 
 class ImageUploadSerializer(serializers.Serializer):
@@ -90,26 +151,19 @@ class ImageUploadSerializer(serializers.Serializer):
 
     def validate_image(self, value):
         """Validate image file."""
-        # Check file size (10MB max)
-        max_size = 10 * 1024 * 1024  # 10 MB
-        if value.size > max_size:
-            raise serializers.ValidationError(
-                f'Image file too large. Maximum size is {max_size / (1024*1024)}MB'
-            )
-
-        # Check content type - be flexible with content type detection
-        allowed_types = ['image/jpeg', 'image/png', 'image/jpg', 'image/pjpeg']
-        allowed_extensions = ['.jpg', '.jpeg', '.png']
-
-        # Get file extension
-        file_name = value.name.lower() if hasattr(value, 'name') else ''
-        has_valid_extension = any(file_name.endswith(ext) for ext in allowed_extensions)
-
-        # Accept if either content type OR extension is valid
-        if value.content_type not in allowed_types and not has_valid_extension:
-            raise serializers.ValidationError(
-                f'Invalid file type. Allowed types: JPEG, PNG. '
-                f'Received content-type: {value.content_type}'
-            )
-
-        return value
+        return validate_upload_image(value)
+
+
+class BatchImageUploadSerializer(serializers.Serializer):
+    """Serializer for uploading several images at once."""
+    images = serializers.ListField(
+        child=serializers.ImageField(),
+        allow_empty=False,
+        max_length=MAX_BATCH_UPLOAD_IMAGES,
+        help_text='Image files of handwritten task notes'
+    )
+
+    def validate_images(self, value):
+        """Validate each image file."""
+        return [validate_upload_image(image) for image in value]
+
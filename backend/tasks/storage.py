@@ -0,0 +1,26 @@
+"""
+Storage backends for task OCR processing.
+"""
+from django.conf import settings
+from storages.backends.s3boto3 import S3Boto3Storage
+
+
+class TaskImageStorage(S3Boto3Storage):
+    """
+    S3/MinIO storage for uploaded images.
+
+    Uploads stream through upload_fileobj and go multipart (threaded
+    parts) above S3_MULTIPART_SIZE. The TransferConfig is built here
+    rather than in settings so importing settings does not load boto3.
+    """
+
+    def __init__(self, **kwargs):
+        if 'transfer_config' not in kwargs:
+            from boto3.s3.transfer import TransferConfig
+
+            kwargs['transfer_config'] = TransferConfig(
+                multipart_threshold=settings.S3_MULTIPART_SIZE,
+                multipart_chunksize=settings.S3_MULTIPART_SIZE,
+                use_threads=True,
+            )
+        super().__init__(**kwargs)
@@ -4,12 +4,12 @@ Celery tasks for OCR processing of handwritten task notes.
 import logging
 import traceback
 from datetime import datetime
-from io import BytesIO
 from PIL import Image
 
 from celery import shared_task
 from django.conf import settings
 from django.core.files.storage import default_storage
+from django.db import transaction
 
 from .models import ProcessingJob, ExtractedTask
 from .ocr_service import get_ocr_service
@@ -17,7 +17,80 @@ from .ocr_service import get_ocr_service
 logger = logging.getLogger(__name__)
 
 
-@shared_task(bind=True, max_retries=3)
+def load_ocr_image(image_file, max_edge):
+    """
+    Decode an uploaded image for OCR, capped at max_edge pixels.
+
+    Returns:
+        (image, scale) where scale is the (x, y) factor mapping
+        coordinates in the returned image back to the original upload
+    """
+    image = Image.open(image_file)
+    original_size = image.size
+    if max(image.size) > max_edge:
+        # JPEGs can be decoded directly at a reduced scale
+        ratio = max_edge / max(image.size)
+        image.draft('RGB', (int(image.size[0] * ratio), int(image.size[1] * ratio)))
+    image.load()
+
+    # Cap the resolution handed to OCR; phone photos are far larger than needed
+    if max(image.size) > max_edge:
+        image.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+
+    scale = (original_size[0] / image.size[0], original_size[1] / image.size[1])
+    return image, scale
+
+
+def scale_bbox(bbox, scale):
+    """Map a bounding box dict from the OCR image back to the original upload."""
+    scale_x, scale_y = scale
+    factors = {'x': scale_x, 'width': scale_x, 'y': scale_y, 'height': scale_y}
+    return {
+        key: round(value * factors[key]) if key in factors and value is not None else value
+        for key, value in bbox.items()
+    }
+
+
+def claim_job(job_id, task_id):
+    """
+    Atomically move a job to processing for this task.
+
+    Brokers may deliver the same message twice; the row lock makes sure
+    only one worker claims a job. Only PENDING jobs are claimed; a task
+    that is about to be retried puts its job back to PENDING first.
+
+    Returns:
+        ProcessingJob, or None if the job is already claimed, finished
+        or locked
+    """
+    with transaction.atomic():
+        job = ProcessingJob.objects.select_for_update(skip_locked=True).filter(id=job_id).first()
+        if job is None:
+            # Either another worker holds the lock right now or the job is gone
+            if not ProcessingJob.objects.filter(id=job_id).exists():
+                raise ProcessingJob.DoesNotExist(f"ProcessingJob {job_id} does not exist")
+            return None
+
+        if job.status != ProcessingJob.Status.PENDING:
+            return None
+
+        job.mark_processing(celery_task_id=task_id)
+    # The lock is released here, before the slow OCR work starts
+    return job
+
+
+@shared_task(
+    bind=True,
+    autoretry_for=(Exception,),
+    dont_autoretry_for=(ProcessingJob.DoesNotExist,),
+    max_retries=5,
+    retry_backoff=10,
+    retry_backoff_max=600,
+    retry_jitter=True,
+    acks_late=True,
+)
 def process_task_image(self, job_id):
     """
     Process uploaded image to extract handwritten tasks using OCR.
@@ -30,36 +103,33 @@ def process_task_image(self, job_id):
     """
     job = None
     try:
-        # Get the job
-        job = ProcessingJob.objects.get(id=job_id)
+        # Claim the job, marking it as processing
+        job = claim_job(job_id, self.request.id)
+        if job is None:
+            logger.info(f"Skipping job {job_id}: already claimed or finished")
+            return {'status': 'skipped', 'job_id': job_id}
         logger.info(f"Starting OCR processing for job {job.transaction_id}")
 
-        # Mark as processing
-        job.mark_processing(celery_task_id=self.request.id)
+        # Decode the image straight from the storage stream
+        with default_storage.open(job.image_path, 'rb') as image_file:
+            image, scale = load_ocr_image(image_file, settings.OCR_MAX_EDGE)
 
-        # Download image from storage
-        image_file = default_storage.open(job.image_path, 'rb')
-        image_data = image_file.read()
-        image_file.close()
-
-        # Open image with PIL
-        image = Image.open(BytesIO(image_data))
-
-        # Get singleton OCR service instance (model loaded only once)
+        # Get shared OCR service instance (model loaded only once)
         ocr_service = get_ocr_service(
             confidence_threshold=settings.OCR_CONFIDENCE_THRESHOLD
         )
 
         # Perform OCR extraction
         logger.info(f"Running OCR on image for job {job.transaction_id}")
-        ocr_results = ocr_service.extract_tasks(image)
+        ocr_results = ocr_service.extract_tasks(image, use_cache=not job.skip_result_cache)
 
-        # Save extracted tasks to database
-        tasks_created = 0
-        total_confidence = 0
+        # Build extracted tasks and save them in one batch
+        extracted_tasks = []
 
         for idx, task_data in enumerate(ocr_results.get('tasks', [])):
-            ExtractedTask.objects.create(
+            # Boxes are stored in the coordinates of the uploaded image
+            bbox = scale_bbox(task_data.get('bbox') or {}, scale)
+            extracted_tasks.append(ExtractedTask(
                 job=job,
                 task_name=task_data.get('name', ''),
                 description=task_data.get('description', ''),
@@ -68,19 +138,21 @@ def process_task_image(self, job_id):
                 priority=task_data.get('priority', 'medium'),
                 position_index=idx,
                 confidence_score=task_data.get('confidence'),
-                bbox_x=task_data.get('bbox', {}).get('x'),
-                bbox_y=task_data.get('bbox', {}).get('y'),
-                bbox_width=task_data.get('bbox', {}).get('width'),
-                bbox_height=task_data.get('bbox', {}).get('height'),
-            )
-            tasks_created += 1
+                bbox_x=bbox.get('x'),
+                bbox_y=bbox.get('y'),
+                bbox_width=bbox.get('width'),
+                bbox_height=bbox.get('height'),
+            ))
 
-            if task_data.get('confidence'):
-                total_confidence += task_data['confidence']
+        with transaction.atomic():
+            ExtractedTask.objects.bulk_create(extracted_tasks, batch_size=500)
 
-        # Calculate average confidence
+        tasks_created = len(extracted_tasks)
+
+        # Average over all tasks; ones without a confidence count as 0
         avg_confidence = (
-            total_confidence / tasks_created if tasks_created > 0 else 0
+            sum(task.confidence_score or 0 for task in extracted_tasks) / tasks_created
+            if tasks_created > 0 else 0
         )
 
         # Mark job as completed
@@ -108,18 +180,56 @@ def process_task_image(self, job_id):
         error_trace = traceback.format_exc()
         logger.error(f"{error_msg}\n{error_trace}")
 
-        if job:
-            job.mark_failed(error_msg, error_trace)
-
-        # Retry if we haven't exceeded max retries
-        if self.request.retries < self.max_retries:
+        # autoretry_for re-queues the task with backoff; only the last
+        # attempt marks the job failed
+        if self.request.retries >= self.max_retries:
+            if job:
+                job.mark_failed(error_msg, error_trace)
+        else:
+            # Release the claim so the retried attempt can pick it up
+            if job:
+                job.mark_pending()
             logger.info(f"Retrying task (attempt {self.request.retries + 1})")
-            raise self.retry(exc=e, countdown=60)  # Retry after 60 seconds
+        raise
 
-        return {
-            'status': 'failed',
-            'error': error_msg,
-        }
+
+# Maximum number of keys accepted by one S3 DeleteObjects request
+S3_DELETE_BATCH_SIZE = 1000
+# Jobs removed per cleanup_old_jobs pass
+CLEANUP_CHUNK_SIZE = 500
+
+
+def delete_storage_objects(paths):
+    """
+    Delete files from default storage, batching S3 deletes.
+
+    S3 buckets get one DeleteObjects call per 1000 keys; DELETE is
+    idempotent, so missing objects need no exists() check. Other storage
+    backends fall back to deleting one file at a time.
+    """
+    bucket = getattr(default_storage, 'bucket', None)
+    if bucket is None:
+        for path in paths:
+            try:
+                default_storage.delete(path)
+            except Exception as e:
+                logger.warning(f"Failed to delete image {path}: {e}")
+        return
+
+    location = getattr(default_storage, 'location', '')
+    for start in range(0, len(paths), S3_DELETE_BATCH_SIZE):
+        batch = paths[start:start + S3_DELETE_BATCH_SIZE]
+        try:
+            response = bucket.delete_objects(Delete={
+                'Objects': [{'Key': f'{location}/{path}' if location else path} for path in batch],
+                'Quiet': True,
+            })
+        except Exception as e:
+            logger.warning(f"Failed to delete {len(batch)} images: {e}")
+            continue
+
+        for error in response.get('Errors', []):
+            logger.warning(f"Failed to delete image {error.get('Key')}: {error.get('Message')}")
 
 
 @shared_task
@@ -138,22 +248,31 @@ def cleanup_old_jobs(days=30):
     # Find old jobs
     old_jobs = ProcessingJob.objects.filter(
         created_at__lt=cutoff_date,
-        status__in=['completed', 'failed']
+        status__in=[
+            ProcessingJob.Status.COMPLETED,
+            ProcessingJob.Status.FAILED,
+        ]
     )
 
-    count = old_jobs.count()
-    logger.info(f"Cleaning up {count} jobs older than {days} days")
-
-    # Delete associated images from storage
-    for job in old_jobs:
-        try:
-            if default_storage.exists(job.image_path):
-                default_storage.delete(job.image_path)
-        except Exception as e:
-            logger.warning(f"Failed to delete image {job.image_path}: {e}")
-
-    # Delete job records (cascades to ExtractedTask)
-    deleted_count, _ = old_jobs.delete()
+    logger.info(f"Cleaning up jobs older than {days} days")
+
+    # Work through the backlog in fixed-size chunks so memory stays bounded;
+    # each pass deletes its rows, so re-querying the head yields the next chunk
+    deleted_count = 0
+    while True:
+        chunk = list(old_jobs.values_list('id', 'image_path')[:CLEANUP_CHUNK_SIZE])
+        if not chunk:
+            break
+        job_ids, image_paths = zip(*chunk)
+
+        # Delete associated images from storage
+        delete_storage_objects(list(image_paths))
+
+        # Delete tasks first so the job delete has nothing left to cascade
+        with transaction.atomic():
+            ExtractedTask.objects.filter(job_id__in=job_ids).delete()
+            deleted, _ = ProcessingJob.objects.filter(id__in=job_ids).delete()
+        deleted_count += deleted
 
     logger.info(f"Deleted {deleted_count} old jobs")
 
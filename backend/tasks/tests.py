@@ -1,15 +1,22 @@
 """
 Tests for task OCR processing.
 """
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.core.files.uploadedfile import SimpleUploadedFile
 from rest_framework.test import APITestCase
 from rest_framework import status
 from PIL import Image
 from io import BytesIO
+from datetime import date
 import uuid
 
-from .models import ProcessingJob, ExtractedTask
+from .models import ProcessingJob, ExtractedTask, job_status_cache_key
+from .ocr_service import OCRService, _parse_due_date
+from .tasks import claim_job, load_ocr_image, scale_bbox
 
 
 class ProcessingJobModelTest(TestCase):
@@ -23,7 +30,7 @@ class ProcessingJobModelTest(TestCase):
             image_size=1024
         )
         self.assertIsNotNone(job.transaction_id)
-        self.assertEqual(job.status, 'pending')
+        self.assertEqual(job.status, ProcessingJob.Status.PENDING)
         self.assertIsNotNone(job.created_at)
 
     def test_mark_processing(self):
@@ -37,7 +44,7 @@ class ProcessingJobModelTest(TestCase):
         job.mark_processing(celery_task_id=task_id)
 
         job.refresh_from_db()
-        self.assertEqual(job.status, 'processing')
+        self.assertEqual(job.status, ProcessingJob.Status.PROCESSING)
         self.assertEqual(job.celery_task_id, task_id)
         self.assertIsNotNone(job.started_at)
 
@@ -52,7 +59,7 @@ class ProcessingJobModelTest(TestCase):
         job.mark_completed(ocr_confidence=0.85)
 
         job.refresh_from_db()
-        self.assertEqual(job.status, 'completed')
+        self.assertEqual(job.status, ProcessingJob.Status.COMPLETED)
         self.assertIsNotNone(job.completed_at)
         self.assertEqual(job.ocr_confidence, 0.85)
         self.assertIsNotNone(job.processing_duration)
@@ -68,10 +75,29 @@ class ProcessingJobModelTest(TestCase):
         job.mark_failed('Test error', 'Test traceback')
 
         job.refresh_from_db()
-        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.status, ProcessingJob.Status.FAILED)
         self.assertEqual(job.error_message, 'Test error')
         self.assertIsNotNone(job.completed_at)
 
+    def test_claim_job(self):
+        """Test only one task can claim a job."""
+        job = ProcessingJob.objects.create(
+            image_path='test/path.jpg',
+            original_filename='test.jpg',
+            image_size=1024
+        )
+        self.assertIsNotNone(claim_job(job.id, 'task-1'))
+        # A redelivered message carries the same task id and must not reclaim
+        self.assertIsNone(claim_job(job.id, 'task-1'))
+        self.assertIsNone(claim_job(job.id, 'task-2'))
+
+        # A retry resets the job to pending first
+        job.mark_pending()
+        self.assertIsNotNone(claim_job(job.id, 'task-1'))
+
+        job.mark_completed()
+        self.assertIsNone(claim_job(job.id, 'task-1'))
+
 
 class ExtractedTaskModelTest(TestCase):
     """Tests for ExtractedTask model."""
@@ -100,6 +126,102 @@ class ExtractedTaskModelTest(TestCase):
         self.assertIsNotNone(task.created_at)
 
 
+class ProcessingJobAdminTest(TestCase):
+    """Tests for the ProcessingJob admin changelist."""
+
+    def setUp(self):
+        """Create jobs with different numbers of tasks."""
+        user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.force_login(user)
+        for count in range(15):
+            job = ProcessingJob.objects.create(
+                image_path='test/path.jpg',
+                original_filename=f'test{count}.jpg',
+                image_size=1024
+            )
+            ExtractedTask.objects.bulk_create([
+                ExtractedTask(job=job, task_name='Task', position_index=idx)
+                for idx in range(count)
+            ])
+
+    def test_changelist_counts_tasks_in_one_query(self):
+        """Test task counts do not cost a query per job and can be sorted."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/admin/tasks/processingjob/?o=-6')
+        self.assertEqual(response.status_code, 200)
+        task_queries = [q for q in queries if 'tasks_extractedtask' in q['sql']]
+        self.assertEqual(len(task_queries), 1)
+
+        counts = [job._task_count for job in response.context['cl'].result_list]
+        self.assertEqual(counts, list(range(14, -1, -1)))
+
+
+class OCRImageTest(TestCase):
+    """Tests for preparing uploaded images for OCR."""
+
+    def create_jpeg(self, size):
+        """Create an in-memory JPEG of the given size."""
+        file = BytesIO()
+        Image.new('RGB', size, color='white').save(file, 'JPEG')
+        file.seek(0)
+        return file
+
+    def test_large_image_bbox_maps_to_original(self):
+        """Test boxes found on a downscaled image map back to the upload."""
+        image, scale = load_ocr_image(self.create_jpeg((4000, 3000)), 1000)
+        self.assertEqual(max(image.size), 1000)
+        self.assertAlmostEqual(scale[0], 4000 / image.size[0])
+        self.assertAlmostEqual(scale[1], 3000 / image.size[1])
+
+        bbox = scale_bbox({'x': 100, 'y': 50, 'width': 200, 'height': 25}, scale)
+        self.assertEqual(bbox, {'x': 400, 'y': 200, 'width': 800, 'height': 100})
+
+    def test_small_image_is_unchanged(self):
+        """Test images within the limit keep their size and boxes."""
+        image, scale = load_ocr_image(self.create_jpeg((800, 600)), 1000)
+        self.assertEqual(image.size, (800, 600))
+        self.assertEqual(scale, (1.0, 1.0))
+        self.assertEqual(scale_bbox({'x': 10, 'y': None}, scale), {'x': 10, 'y': None})
+
+
+class OCRServiceTest(TestCase):
+    """Tests for OCR service helpers that need no OCR backend."""
+
+    def setUp(self):
+        """Create a service without loading any model."""
+        self.service = OCRService(backend='tesseract', lazy=True)
+
+    def test_extract_tasks_rejects_unsupported_type(self):
+        """Test unsupported inputs raise TypeError instead of failing later."""
+        with self.assertRaises(TypeError):
+            self.service.extract_tasks('note.jpg')
+
+    def test_tesseract_line_grouping(self):
+        """Test words are grouped into lines by their top offset."""
+        data = {
+            'text': ['1.', 'Buy', '', 'milk', 'skipped', '', '2.', 'Call', 'Bob', 'Notes'],
+            'conf': [90, 80, 95, 70, -1, 95, 90, 60, 60, 90],
+            'top': [10, 12, 12, 15, 15, 50, 52, 55, 55, 100],
+            'left': [0] * 10,
+        }
+        tasks = self.service._parse_tesseract_results(data, (800, 600))
+
+        # Empty words inside a line keep their separator; leading ones do not
+        self.assertEqual([task['name'] for task in tasks], ['Buy  milk', 'Call Bob'])
+        self.assertEqual([task['position_index'] for task in tasks], [0, 1])
+        self.assertAlmostEqual(tasks[0]['confidence'], (90 + 80 + 95 + 70) / 4 / 100)
+        self.assertAlmostEqual(tasks[1]['confidence'], (95 + 90 + 60 + 60) / 4 / 100)
+
+    def test_parse_due_date(self):
+        """Test dots.ocr due dates in the supported formats."""
+        self.assertEqual(_parse_due_date('2025-03-04'), date(2025, 3, 4))
+        self.assertEqual(_parse_due_date('04/03/2025'), date(2025, 3, 4))
+        # Not a valid DD/MM date, so read as MM/DD
+        self.assertEqual(_parse_due_date('03/25/2025'), date(2025, 3, 25))
+        self.assertIsNone(_parse_due_date('2025-02-30'))
+        self.assertIsNone(_parse_due_date('soon'))
+
+
 class ImageUploadAPITest(APITestCase):
     """Tests for image upload API."""
 
@@ -135,11 +257,44 @@ class ImageUploadAPITest(APITestCase):
         )
         self.assertIsNotNone(job)
 
+    def test_upload_idempotency_key_returns_existing_job(self):
+        """Test repeating an upload with the same Idempotency-Key."""
+        job = ProcessingJob.objects.create(
+            image_path='test/path.jpg',
+            original_filename='test.jpg',
+            image_size=1024,
+            idempotency_key='abc123'
+        )
+        response = self.client.post(
+            '/api/upload/',
+            {'image': self.create_test_image()},
+            format='multipart',
+            HTTP_IDEMPOTENCY_KEY='abc123'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['transaction_id'], str(job.transaction_id))
+        self.assertEqual(ProcessingJob.objects.count(), 1)
+
     def test_upload_without_image(self):
         """Test upload without image."""
         response = self.client.post('/api/upload/', {}, format='multipart')
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_batch_upload_validates_each_image(self):
+        """Test a batch upload is rejected if any image is invalid."""
+        response = self.client.post('/api/upload/batch/', {}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        text_file = SimpleUploadedFile('test.txt', b'test content', content_type='text/plain')
+        response = self.client.post(
+            '/api/upload/batch/',
+            {'images': [self.create_test_image(), text_file]},
+            format='multipart'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(ProcessingJob.objects.exists())
+
     def test_upload_invalid_file_type(self):
         """Test upload with invalid file type."""
         file = SimpleUploadedFile(
@@ -174,6 +329,19 @@ class JobStatusAPITest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['status'], 'pending')
 
+    def test_get_job_status_task_count(self):
+        """Test task count is fetched with the job in a single query."""
+        self.job.mark_processing()
+        ExtractedTask.objects.create(job=self.job, task_name='A', position_index=0)
+        ExtractedTask.objects.create(job=self.job, task_name='B', position_index=1)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                f'/api/status/{self.job.transaction_id}/'
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['task_count'], 2)
+
     def test_get_job_status_completed(self):
         """Test getting completed job status."""
         self.job.mark_processing()
@@ -186,12 +354,119 @@ class JobStatusAPITest(APITestCase):
             position_index=0
         )
 
+        # Job (with task count) plus one prefetch query for its tasks
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                f'/api/status/{self.job.transaction_id}/'
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], 'completed')
+        self.assertIn('extracted_tasks', response.data)
+        self.assertNotIn('bbox_x', response.data['extracted_tasks'][0])
+
         response = self.client.get(
-            f'/api/status/{self.job.transaction_id}/'
+            f'/api/status/{self.job.transaction_id}/?include=bbox'
+        )
+        self.assertIn('bbox_x', response.data['extracted_tasks'][0])
+
+    def test_get_job_status_cached_while_in_flight(self):
+        """Test in-flight status is cached until the job changes state."""
+        url = f'/api/status/{self.job.transaction_id}/'
+        self.client.get(url)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.data['status'], 'pending')
+
+        self.job.mark_processing()
+        response = self.client.get(url)
+        self.assertEqual(response.data['status'], 'processing')
+
+    def test_wait_for_job_status(self):
+        """Test the long-poll endpoint answers at once for finished jobs."""
+        self.job.mark_processing()
+        response = self.client.get(
+            f'/api/status/{self.job.transaction_id}/wait/?timeout=0'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], 'processing')
+
+        self.job.mark_completed()
+        response = self.client.get(
+            f'/api/status/{self.job.transaction_id}/wait/'
         )
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['status'], 'completed')
-        self.assertIn('extracted_tasks', response.data)
+
+    def test_wait_ignores_stale_cached_status(self):
+        """Test waits answer from the database, not a stale cached status."""
+        self.job.mark_processing()
+        # Prime the status cache the way an earlier poll would
+        response = self.client.get(f'/api/status/{self.job.transaction_id}/')
+        stale = response.data
+        self.job.mark_completed()
+        # A worker's cache.delete does not reach another process' cache
+        cache.set(job_status_cache_key(self.job.transaction_id), stale)
+
+        response = self.client.get(f'/api/status/{self.job.transaction_id}/wait/')
+        self.assertEqual(response.data['status'], 'completed')
+
+        response = self.client.get(
+            f'/api/events/{self.job.transaction_id}/',
+            HTTP_ACCEPT='text/event-stream'
+        )
+        self.assertIn('"status":"completed"', b''.join(response.streaming_content).decode())
+
+    def test_job_events_stream(self):
+        """Test the event stream ends with the final status of finished jobs."""
+        self.job.mark_processing()
+        self.job.mark_completed()
+        response = self.client.get(
+            f'/api/events/{self.job.transaction_id}/',
+            HTTP_ACCEPT='text/event-stream'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = b''.join(response.streaming_content).decode()
+        self.assertEqual(body.count('event: status'), 1)
+        self.assertIn('"status":"completed"', body)
+
+        response = self.client.get(
+            f'/api/events/{uuid.uuid4()}/', HTTP_ACCEPT='text/event-stream'
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_batch_job_status(self):
+        """Test checking several jobs in one request."""
+        other = ProcessingJob.objects.create(
+            image_path='test/other.jpg',
+            original_filename='other.jpg',
+            image_size=1024
+        )
+        other.mark_processing()
+        fake_id = uuid.uuid4()
+
+        response = self.client.post('/api/status/batch/', {
+            'ids': [str(self.job.transaction_id), str(other.transaction_id), str(fake_id)]
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        statuses = {job['transaction_id']: job['status'] for job in response.data['jobs']}
+        self.assertEqual(statuses, {
+            str(self.job.transaction_id): 'pending',
+            str(other.transaction_id): 'processing',
+        })
+        self.assertEqual(response.data['not_found'], [str(fake_id)])
+
+        response = self.client.post('/api/status/batch/', {'ids': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_batch_job_status_malformed_id(self):
+        """Test a malformed id in a batch status request is a 400."""
+        response = self.client.post('/api/status/batch/', {
+            'ids': ['nope', str(self.job.transaction_id)]
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('ids', response.json()['error'])
 
     def test_get_nonexistent_job(self):
         """Test getting status of nonexistent job."""
@@ -2,7 +2,15 @@
 URL routing for tasks API.
 """
 from django.urls import path
-from .views import ImageUploadView, JobStatusView, JobDetailView
+from .views import (
+    ImageUploadView,
+    BatchImageUploadView,
+    JobStatusView,
+    JobStatusWaitView,
+    JobEventsView,
+    BatchJobStatusView,
+    JobDetailView,
+)
 
 app_name = 'tasks'
 
@@ -10,9 +18,21 @@ urlpatterns = [
     # Upload image for OCR processing
     path('upload/', ImageUploadView.as_view(), name='upload'),
 
+    # Upload several images at once
+    path('upload/batch/', BatchImageUploadView.as_view(), name='upload-batch'),
+
     # Check job status
     path('status/<uuid:transaction_id>/', JobStatusView.as_view(), name='status'),
 
+    # Check the status of many jobs at once
+    path('status/batch/', BatchJobStatusView.as_view(), name='status-batch'),
+
+    # Long-poll until the job completes or fails
+    path('status/<uuid:transaction_id>/wait/', JobStatusWaitView.as_view(), name='status-wait'),
+
+    # Server-Sent Events stream of the job status
+    path('events/<uuid:transaction_id>/', JobEventsView.as_view(), name='events'),
+
     # Get full job details
     path('jobs/<uuid:transaction_id>/', JobDetailView.as_view(), name='job-detail'),
 ]
@@ -2,33 +2,95 @@
 API views for task OCR processing.
 """
 import logging
+import os
+import time
+import uuid
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
+from django.conf import settings
+from django.core.cache import cache
 from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Prefetch, prefetch_related_objects
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from redis import RedisError
 
-from .models import ProcessingJob
+from .events import subscribe_job_status, wait_for_message
+from .models import ProcessingJob, ExtractedTask, job_status_cache_key
+from .renderers import EventStreamRenderer, ORJSONRenderer, sse_message
 from .serializers import (
+    ALLOWED_EXTENSIONS,
+    BatchImageUploadSerializer,
+    BatchJobStatusSerializer,
     ImageUploadSerializer,
     ProcessingJobSerializer,
     JobStatusSerializer,
+    ExtractedTaskSerializer,
 )
 from .tasks import process_task_image
 
 logger = logging.getLogger(__name__)
 
 
+def api_jobs():
+    """
+    Jobs queryset for API responses.
+
+    Skips error_traceback, which can be large and is never rendered.
+    """
+    return ProcessingJob.objects.defer('error_traceback')
+
+
+def extracted_tasks_prefetch(include_bbox=True):
+    """Prefetch a job's tasks, loading only the columns the API returns."""
+    return Prefetch(
+        'extracted_tasks',
+        queryset=ExtractedTask.objects.only(
+            'job', *ExtractedTaskSerializer.field_names(include_bbox)
+        ).order_by('position_index'),
+    )
+
+
+def upload_key(filename):
+    """
+    Storage key for an uploaded image: uploads/YYYY/MM/<random hex><ext>.
+
+    Random names never collide and spread keys across prefixes; the
+    client-supplied name is only kept on the job for display.
+    """
+    ext = os.path.splitext(filename)[1].lower()
+    if ext not in ALLOWED_EXTENSIONS:
+        ext = ''
+    return f"uploads/{timezone.now():%Y/%m}/{uuid.uuid4().hex}{ext}"
+
+
+def skips_result_cache(request):
+    """Whether the upload asked for a fresh OCR run (Cache-Control: no-cache)."""
+    directives = request.headers.get('Cache-Control', '').lower().split(',')
+    return 'no-cache' in (directive.strip() for directive in directives)
+
+
+def wants_bbox(request):
+    """Whether the client asked for task bounding boxes (?include=bbox)."""
+    return 'bbox' in request.query_params.get('include', '').split(',')
+
+
 class ImageUploadView(APIView):
     """
     API endpoint to upload task image for OCR processing.
 
     POST /api/upload
     - Accepts: multipart/form-data with 'image' field
+    - Header: optional Idempotency-Key; repeats return the original job
+    - Header: optional Cache-Control: no-cache; skips the worker's OCR result cache
     - Returns: transaction_id
     """
     parser_classes = [MultiPartParser, FormParser]
+    IDEMPOTENCY_KEY_MAX_LENGTH = 255
 
     def post(self, request):
         """Handle image upload."""
@@ -42,34 +104,58 @@ class ImageUploadView(APIView):
 
         image_file = serializer.validated_data['image']
 
+        # Repeated uploads with the same Idempotency-Key return the original job
+        idempotency_key = request.headers.get('Idempotency-Key') or None
+        if idempotency_key:
+            if len(idempotency_key) > self.IDEMPOTENCY_KEY_MAX_LENGTH:
+                return Response(
+                    {'error': {'Idempotency-Key': [
+                        f'Ensure this header has no more than '
+                        f'{self.IDEMPOTENCY_KEY_MAX_LENGTH} characters.'
+                    ]}},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            existing = self._replay(idempotency_key)
+            if existing is not None:
+                return existing
+
         try:
             # Save image to MinIO/S3
             file_path = default_storage.save(
-                f"uploads/{image_file.name}",
+                upload_key(image_file.name),
                 image_file
             )
 
-            # Create processing job record
-            job = ProcessingJob.objects.create(
-                image_path=file_path,
-                original_filename=image_file.name,
-                image_size=image_file.size,
-                status='pending'
-            )
+            try:
+                with transaction.atomic():
+                    # Create processing job record
+                    job = ProcessingJob.objects.create(
+                        image_path=file_path,
+                        original_filename=image_file.name,
+                        image_size=image_file.size,
+                        status=ProcessingJob.Status.PENDING,
+                        idempotency_key=idempotency_key,
+                        skip_result_cache=skips_result_cache(request)
+                    )
 
-            # Trigger async OCR processing
-            task = process_task_image.delay(job.id)
-            job.celery_task_id = task.id
-            job.save(update_fields=['celery_task_id'])
+                    # Trigger async OCR processing once the job row is visible;
+                    # the worker records its celery_task_id in mark_processing()
+                    transaction.on_commit(lambda: process_task_image.delay(job.id))
+            except IntegrityError:
+                if not idempotency_key:
+                    raise
+                # A concurrent request with the same key won the race
+                default_storage.delete(file_path)
+                existing = self._replay(idempotency_key)
+                if existing is None:
+                    raise
+                return existing
 
-            logger.info(
-                f"Image uploaded successfully. Job: {job.transaction_id}, "
-                f"Task: {task.id}"
-            )
+            logger.info(f"Image uploaded successfully. Job: {job.transaction_id}")
 
             return Response({
                 'transaction_id': str(job.transaction_id),
-                'status': job.status,
+                'status': job.status_name,
                 'message': 'Image uploaded successfully. Processing started.'
             }, status=status.HTTP_201_CREATED)
 
@@ -80,6 +166,101 @@ class ImageUploadView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    def _replay(self, idempotency_key):
+        """
+        Response for a job already uploaded with this key, or None.
+
+        A failed job releases its key so the upload can be retried.
+        """
+        job = ProcessingJob.objects.filter(idempotency_key=idempotency_key).first()
+        if job is None:
+            return None
+        if job.status == ProcessingJob.Status.FAILED:
+            ProcessingJob.objects.filter(pk=job.pk).update(idempotency_key=None)
+            return None
+
+        return Response({
+            'transaction_id': str(job.transaction_id),
+            'status': job.status_name,
+            'message': 'Image already uploaded.'
+        }, status=status.HTTP_200_OK)
+
+
+class BatchImageUploadView(APIView):
+    """
+    API endpoint to upload several task images in one request.
+
+    POST /api/upload/batch/
+    - Accepts: multipart/form-data with repeated 'images' fields (up to 20)
+    - Header: optional Cache-Control: no-cache; skips the worker's OCR result cache
+    - Returns: transaction_id of each image, in upload order
+    """
+    parser_classes = [MultiPartParser, FormParser]
+
+    def post(self, request):
+        """Handle batch image upload."""
+        serializer = BatchImageUploadSerializer(data=request.data)
+
+        if not serializer.is_valid():
+            return Response(
+                {'error': serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        images = serializer.validated_data['images']
+        skip_result_cache = skips_result_cache(request)
+
+        file_paths = []
+        jobs = None
+        try:
+            # Save images to MinIO/S3
+            for image_file in images:
+                file_paths.append(default_storage.save(upload_key(image_file.name), image_file))
+
+            with transaction.atomic():
+                jobs = ProcessingJob.objects.bulk_create([
+                    ProcessingJob(
+                        image_path=file_path,
+                        original_filename=image_file.name,
+                        image_size=image_file.size,
+                        status=ProcessingJob.Status.PENDING,
+                        skip_result_cache=skip_result_cache
+                    )
+                    for file_path, image_file in zip(file_paths, images)
+                ])
+
+                job_ids = [job.id for job in jobs]
+
+                def enqueue():
+                    for job_id in job_ids:
+                        process_task_image.delay(job_id)
+
+                transaction.on_commit(enqueue)
+
+            logger.info(f"Batch of {len(jobs)} images uploaded successfully")
+
+            return Response({
+                'jobs': [
+                    {'transaction_id': str(job.transaction_id), 'status': job.status_name}
+                    for job in jobs
+                ],
+                'message': 'Images uploaded successfully. Processing started.'
+            }, status=status.HTTP_201_CREATED)
+
+        except Exception as e:
+            logger.error(f"Error uploading image batch: {str(e)}", exc_info=True)
+            if jobs is None:
+                # No jobs point at the saved images; do not leave them behind
+                for file_path in file_paths:
+                    try:
+                        default_storage.delete(file_path)
+                    except Exception:
+                        logger.warning(f"Failed to delete image {file_path}")
+            return Response(
+                {'error': 'Failed to upload images. Please try again.'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
 
 class JobStatusView(APIView):
     """
@@ -87,23 +268,192 @@ class JobStatusView(APIView):
 
     GET /api/status/{transaction_id}
     - Returns: job status and results if completed
+    - Query: include=bbox adds task bounding boxes to completed results
     """
 
     def get(self, request, transaction_id):
         """Get job status and results."""
+        return Response(self.get_status_data(request, transaction_id))
+
+    def get_status_data(self, request, transaction_id, use_cache=True):
+        """
+        Status payload of a job (404 if it does not exist).
+
+        use_cache=False reads the database even if a cached in-flight
+        status exists, e.g. right after a completion event.
+        """
+        # In-flight jobs are polled every few seconds; serve repeats from cache
+        cache_key = job_status_cache_key(transaction_id)
+        cached = cache.get(cache_key) if use_cache else None
+        if cached is not None:
+            return cached
+
+        # Count tasks in the same query instead of a separate COUNT per job
         job = get_object_or_404(
-            ProcessingJob,
+            api_jobs().annotate(task_count=Count('extracted_tasks')),
             transaction_id=transaction_id
         )
 
         # If job is completed, return full details
-        if job.status == 'completed':
-            serializer = ProcessingJobSerializer(job)
+        if job.status == ProcessingJob.Status.COMPLETED:
+            # Bounding boxes are opt-in here; the job detail endpoint always has them
+            include_bbox = wants_bbox(request)
+            prefetch_related_objects([job], extracted_tasks_prefetch(include_bbox))
+            serializer = ProcessingJobSerializer(job, context={'include_bbox': include_bbox})
         else:
             # Otherwise, return lightweight status
             serializer = JobStatusSerializer(job)
+            if job.status in (ProcessingJob.Status.PENDING, ProcessingJob.Status.PROCESSING):
+                cache.set(cache_key, serializer.data, timeout=ProcessingJob.STATUS_CACHE_TIMEOUT)
 
-        return Response(serializer.data)
+        return serializer.data
+
+
+class JobStatusWaitView(JobStatusView):
+    """
+    Long-poll variant of the status endpoint.
+
+    GET /api/status/{transaction_id}/wait/?timeout=25
+    - Blocks until the job completes or fails, or the timeout expires
+    - Returns: same body as /api/status/{transaction_id}/
+    """
+    FINAL_STATUSES = (ProcessingJob.Status.COMPLETED, ProcessingJob.Status.FAILED)
+    # Seconds between database checks when Redis events are unavailable
+    FALLBACK_POLL_INTERVAL = 1
+
+    def get(self, request, transaction_id):
+        """Wait for a final job status, then return it."""
+        try:
+            timeout = float(request.query_params.get('timeout', settings.JOB_STATUS_WAIT_MAX))
+        except ValueError:
+            timeout = settings.JOB_STATUS_WAIT_MAX
+        timeout = min(max(timeout, 0), settings.JOB_STATUS_WAIT_MAX)
+
+        pubsub = self._subscribe(transaction_id)
+        try:
+            if not self._is_final(transaction_id) and timeout:
+                self._wait(transaction_id, pubsub, timeout)
+        finally:
+            if pubsub is not None:
+                pubsub.close()
+
+        # The cached status may predate the event we just woke up for (the
+        # worker's cache.delete does not reach a per-process cache)
+        return Response(self.get_status_data(request, transaction_id, use_cache=False))
+
+    def _subscribe(self, transaction_id):
+        """Subscribe to the job's events, or None when Redis is unavailable."""
+        try:
+            # Subscribe before reading the status so a change in between is not missed
+            return subscribe_job_status(transaction_id)
+        except RedisError as e:
+            logger.warning(f"Job events unavailable, polling the database instead: {e}")
+            return None
+
+    def _wait(self, transaction_id, pubsub, timeout):
+        """Block until the job reaches a final status or the timeout expires."""
+        try:
+            if pubsub is not None:
+                wait_for_message(pubsub, timeout)
+            else:
+                self._poll_until_final(transaction_id, timeout)
+        except RedisError as e:
+            logger.warning(f"Lost job events while waiting for {transaction_id}: {e}")
+
+    def _is_final(self, transaction_id):
+        """Whether the job has completed or failed (404 if it does not exist)."""
+        job_status = get_object_or_404(
+            ProcessingJob.objects.values_list('status', flat=True),
+            transaction_id=transaction_id
+        )
+        return job_status in self.FINAL_STATUSES
+
+    def _poll_until_final(self, transaction_id, timeout):
+        """Fallback wait: re-check the database until final or timed out."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            time.sleep(min(self.FALLBACK_POLL_INTERVAL, deadline - time.monotonic()))
+            if self._is_final(transaction_id):
+                return
+
+
+class JobEventsView(JobStatusWaitView):
+    """
+    Server-Sent Events stream of a job's status.
+
+    GET /api/events/{transaction_id}/
+    - Sends the current status, then the next one once the job completes
+      or fails (or after JOB_STATUS_WAIT_MAX seconds)
+    - Each event's data is the body of /api/status/{transaction_id}/
+    - Clients reconnect until they receive a completed or failed status
+    """
+    renderer_classes = [ORJSONRenderer, EventStreamRenderer]
+    FINAL_STATUS_NAMES = ('completed', 'failed')
+    # Milliseconds clients wait before reconnecting after the stream ends
+    RECONNECT_DELAY = 1000
+
+    def get(self, request, transaction_id):
+        """Stream status events for the job."""
+        pubsub = self._subscribe(transaction_id)
+        try:
+            data = self.get_status_data(request, transaction_id, use_cache=False)
+        except Exception:
+            if pubsub is not None:
+                pubsub.close()
+            raise
+
+        response = StreamingHttpResponse(
+            self._stream(request, transaction_id, data, pubsub),
+            content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        # Keep proxies such as nginx from buffering the stream
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    def _stream(self, request, transaction_id, data, pubsub):
+        """Yield the current status, then the status after one wait window."""
+        try:
+            yield f"retry: {self.RECONNECT_DELAY}\n\n".encode()
+            yield sse_message(data, event='status')
+            if data['status'] not in self.FINAL_STATUS_NAMES:
+                self._wait(transaction_id, pubsub, settings.JOB_STATUS_WAIT_MAX)
+                data = self.get_status_data(request, transaction_id, use_cache=False)
+                yield sse_message(data, event='status')
+        finally:
+            if pubsub is not None:
+                pubsub.close()
+
+
+class BatchJobStatusView(APIView):
+    """
+    API endpoint to check the status of many jobs at once.
+
+    POST /api/status/batch/
+    - Accepts: {"ids": [transaction_id, ...]} (up to 200)
+    - Returns: lightweight status of each job found, plus the unknown ids
+    """
+
+    def post(self, request):
+        """Get the status of several jobs in one query."""
+        serializer = BatchJobStatusSerializer(data=request.data)
+
+        if not serializer.is_valid():
+            return Response(
+                {'error': serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        ids = serializer.validated_data['ids']
+        jobs = api_jobs().filter(
+            transaction_id__in=ids
+        ).annotate(task_count=Count('extracted_tasks'))
+
+        found = {job.transaction_id for job in jobs}
+        return Response({
+            'jobs': JobStatusSerializer(jobs, many=True).data,
+            'not_found': [str(tid) for tid in dict.fromkeys(ids) if tid not in found],
+        })
 
 
 class JobDetailView(APIView):
@@ -117,7 +467,7 @@ class JobDetailView(APIView):
     def get(self, request, transaction_id):
         """Get complete job details."""
         job = get_object_or_404(
-            ProcessingJob,
+            api_jobs().prefetch_related(extracted_tasks_prefetch()),
             transaction_id=transaction_id
         )
 
@@ -9,6 +9,9 @@ import sys
 API_URL = "http://localhost:8000/api"
 IMAGE_PATH = "test_assets/tasks_photo.jpg"
 
+# Shared session keeps the connection alive across upload and polls
+session = requests.Session()
+
 def test_upload(test_num):
     """Upload and wait for results."""
     print(f"\n{'='*50}")
@@ -19,14 +22,14 @@ def test_upload(test_num):
 
     # Upload
     with open(IMAGE_PATH, 'rb') as f:
-        response = requests.post(f"{API_URL}/upload/", files={'image': f})
+        response = session.post(f"{API_URL}/upload/", files={'image': f})
 
     transaction_id = response.json()['transaction_id']
     print(f"Uploaded: {transaction_id}")
 
-    # Poll for completion
+    # Wait for completion (the server holds the request until the job finishes)
     while True:
-        response = requests.get(f"{API_URL}/status/{transaction_id}/")
+        response = session.get(f"{API_URL}/status/{transaction_id}/wait/")
         data = response.json()
         status = data['status']
 
@@ -41,8 +44,6 @@ def test_upload(test_num):
             print(f"Status: Failed - {data.get('error_message')}")
             sys.exit(1)
 
-        time.sleep(2)
-
 if __name__ == "__main__":
     print("\n" + "="*50)
     print("TESTING MODEL REUSE")
@@ -12,6 +12,10 @@ API_URL = "http://localhost:8000/api"
 IMAGE_PATH = "test_assets/tasks_photo.jpg"
 MAX_ATTEMPTS = 30
 POLL_INTERVAL = 2
+WAIT_TIMEOUT = 20  # seconds the server may hold each status request
+
+# Shared session keeps the connection alive across upload and polls
+session = requests.Session()
 
 
 def upload_image(image_path):
@@ -32,7 +36,7 @@ def upload_image(image_path):
     try:
         with open(image_path, 'rb') as f:
             files = {'image': f}
-            response = requests.post(f"{API_URL}/upload/", files=files)
+            response = session.post(f"{API_URL}/upload/", files=files)
             response.raise_for_status()
 
         data = response.json()
@@ -52,12 +56,16 @@ def upload_image(image_path):
 
 
 def poll_for_results(transaction_id):
-    """Poll the API for processing results."""
-    print("Step 2: Polling for results...")
+    """Long-poll the API for processing results."""
+    print("Step 2: Waiting for results...")
 
     for attempt in range(1, MAX_ATTEMPTS + 1):
         try:
-            response = requests.get(f"{API_URL}/status/{transaction_id}/")
+            response = session.get(
+                f"{API_URL}/status/{transaction_id}/wait/",
+                params={'timeout': WAIT_TIMEOUT},
+                timeout=WAIT_TIMEOUT + 10,
+            )
             response.raise_for_status()
             data = response.json()
 
@@ -75,7 +83,8 @@ def poll_for_results(transaction_id):
                 return False
 
             elif current_status in ['pending', 'processing']:
-                time.sleep(POLL_INTERVAL)
+                # The wait endpoint already blocked until its timeout
+                continue
 
             else:
                 print(f"  Unknown status: {current_status}")
@@ -85,7 +94,7 @@ def poll_for_results(transaction_id):
             print(f"  Error checking status: {e}")
             time.sleep(POLL_INTERVAL)
 
-    print(f"\n❌ Timeout waiting for results after {MAX_ATTEMPTS * POLL_INTERVAL} seconds")
+    print(f"\n❌ Timeout waiting for results after {MAX_ATTEMPTS * WAIT_TIMEOUT} seconds")
     return False
 
 
@@ -3,45 +3,99 @@
 Test script to upload image TWICE and verify model is loaded only once.
 The second call should be faster and use the same memory.
 """
+import argparse
+import hashlib
+import random
 import requests
+import statistics
 import time
 import sys
 import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from requests.adapters import HTTPAdapter
+from urllib3 import encode_multipart_formdata
+
+try:
+    # Optional: faster decoding of the status payloads
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
 
 API_URL = "http://localhost:8000/api"
 IMAGE_PATH = "test_assets/tasks_photo.jpg"
-MAX_ATTEMPTS = 60  # Increased for first call with model loading
-POLL_INTERVAL = 2
-
-
-def upload_image(image_path, test_number):
-    """Upload image to the API."""
-    print(f"\n{'='*60}")
-    print(f"TEST #{test_number}: Uploading image...")
-    print(f"{'='*60}\n")
-
-    # Check if file exists
+IMAGE_NAME = Path(IMAGE_PATH).name
+POLL_TIMEOUT = 120  # seconds; generous for the first call with model loading
+WAIT_TIMEOUT = 5  # seconds the server may hold each status request
+EVENTS_READ_TIMEOUT = 40  # seconds; longer than the server's event stream window
+RETRY_DELAY_MAX = 2
+VERBOSE = False  # print every status response; set by --verbose
+# Ask the worker to run OCR even for an image it has seen before;
+# cleared by --reuse-results
+BYPASS_RESULT_CACHE = True
+
+# Shared session keeps the connection alive across uploads and polls
+session = requests.Session()
+
+
+def load_image(image_path):
+    """Read the test image once; both uploads send the same bytes."""
     path = Path(image_path)
-    if not path.exists():
+    try:
+        image_bytes = path.read_bytes()
+    except FileNotFoundError:
         print(f"[ERROR] Image file not found at {image_path}")
         sys.exit(1)
 
-    file_size = path.stat().st_size / 1024  # KB
+    file_size = len(image_bytes) / 1024  # KB
     print(f"[OK] Found image: {image_path} ({file_size:.2f} KB)")
+    return image_bytes
+
+
+def upload_headers(content_type):
+    """Headers for an upload request."""
+    headers = {'Content-Type': content_type}
+    if BYPASS_RESULT_CACHE:
+        # Workers cache OCR results by pixel content (OCR_CACHE_SIZE)
+        headers['Cache-Control'] = 'no-cache'
+    return headers
+
+
+def encode_upload(images, field='image'):
+    """
+    Encode a multipart upload body ahead of time.
+
+    Bodies are built before any timing starts and can be shared by
+    requests (and threads) as immutable bytes.
+
+    Returns:
+        (body, content_type)
+    """
+    return encode_multipart_formdata(
+        [(field, (IMAGE_NAME, image_bytes, 'image/jpeg')) for image_bytes in images]
+    )
+
+
+def upload_image(upload, test_number, idempotency_key=None):
+    """Upload the pre-encoded image to the API."""
+    print(f"\n{'='*60}")
+    print(f"TEST #{test_number}: Uploading image...")
+    print(f"{'='*60}\n")
 
     # Upload
-    upload_start = time.time()
+    upload_start = time.perf_counter()
     try:
-        with open(image_path, 'rb') as f:
-            files = {'image': f}
-            response = requests.post(f"{API_URL}/upload/", files=files)
-            response.raise_for_status()
-
-        data = response.json()
+        body, content_type = upload
+        headers = upload_headers(content_type)
+        if idempotency_key:
+            headers['Idempotency-Key'] = idempotency_key
+        response = session.post(f"{API_URL}/upload/", data=body, headers=headers)
+        response.raise_for_status()
+
+        data = json_loads(response.content)
         transaction_id = data['transaction_id']
         status = data['status']
-        upload_end = time.time()
+        upload_end = time.perf_counter()
 
         print(f"[OK] Upload successful! (took {upload_end - upload_start:.2f}s)")
         print(f"  Transaction ID: {transaction_id}")
@@ -55,21 +109,74 @@ def upload_image(image_path, test_number):
         sys.exit(1)
 
 
+def read_status_events(events_url):
+    """
+    Read one Server-Sent Events stream of the job status.
+
+    Returns the last status received, or None if the server has no event
+    stream for this job.
+    """
+    with session.get(
+        events_url,
+        headers={'Accept': 'text/event-stream'},
+        stream=True,
+        timeout=(5, EVENTS_READ_TIMEOUT)
+    ) as response:
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+
+        data = None
+        for line in response.iter_lines(decode_unicode=True):
+            if line and line.startswith('data:'):
+                data = json_loads(line[len('data:'):])
+        return data
+
+
+def fetch_status(wait_url):
+    """Long-poll the status endpoint once."""
+    # The server answers as soon as the job finishes, or after WAIT_TIMEOUT
+    response = session.get(
+        wait_url,
+        params={'timeout': WAIT_TIMEOUT},
+        timeout=WAIT_TIMEOUT + 5
+    )
+    response.raise_for_status()
+    return json_loads(response.content)
+
+
 def poll_for_results(transaction_id, upload_start_time, test_number):
-    """Poll the API for processing results."""
+    """Wait for processing results, preferring the server's event stream."""
     print(f"Polling for results (Test #{test_number})...")
 
-    for attempt in range(1, MAX_ATTEMPTS + 1):
+    deadline = time.perf_counter() + POLL_TIMEOUT
+    attempt = 0
+    errors = 0  # backoff step for failed requests
+    use_events = True
+    events_url = f"{API_URL}/events/{transaction_id}/"
+    wait_url = f"{API_URL}/status/{transaction_id}/wait/"
+
+    def backoff(step):
+        """Exponential delay for the given step, capped, with a little jitter."""
+        delay = min(RETRY_DELAY_MAX, 2 ** step) + random.uniform(0, 0.1)
+        time.sleep(max(0, min(delay, deadline - time.perf_counter())))
+
+    while time.perf_counter() < deadline:
+        attempt += 1
         try:
-            response = requests.get(f"{API_URL}/status/{transaction_id}/")
-            response.raise_for_status()
-            data = response.json()
+            data = read_status_events(events_url) if use_events else None
+            if data is None:
+                # No event stream (older server); fall back to long-polling
+                use_events = False
+                data = fetch_status(wait_url)
 
             current_status = data['status']
-            print(f"  Attempt {attempt}/{MAX_ATTEMPTS} - Status: {current_status}")
+            if VERBOSE:
+                print(f"  Attempt {attempt} - Status: {current_status}")
+            errors = 0
 
             if current_status == 'completed':
-                end_time = time.time()
+                end_time = time.perf_counter()
                 total_time = end_time - upload_start_time
 
                 print(f"\n[OK] Processing completed!")
@@ -83,18 +190,19 @@ def poll_for_results(transaction_id, upload_start_time, test_number):
                 print(f"  Error: {data.get('error_message', 'Unknown error')}")
                 return False, None
 
-            elif current_status in ['pending', 'processing']:
-                time.sleep(POLL_INTERVAL)
-
-            else:
+            elif current_status not in ['pending', 'processing']:
                 print(f"  Unknown status: {current_status}")
-                time.sleep(POLL_INTERVAL)
+
+        except requests.exceptions.ReadTimeout:
+            # The wait window passed without an answer; just ask again
+            continue
 
         except requests.exceptions.RequestException as e:
             print(f"  Error checking status: {e}")
-            time.sleep(POLL_INTERVAL)
+            backoff(errors)
+            errors += 1
 
-    print(f"\n[ERROR] Timeout waiting for results after {MAX_ATTEMPTS * POLL_INTERVAL} seconds")
+    print(f"\n[ERROR] Timeout waiting for results after {POLL_TIMEOUT} seconds")
     return False, None
 
 
@@ -113,8 +221,117 @@ def display_results(data):
             print(f"  {i}. {task.get('task_name', 'N/A')} (Priority: {task.get('priority', 'N/A')})")
 
 
+def run_one(upload, test_number):
+    """Upload once and wait for the result; returns the total time or None."""
+    transaction_id, start_time = upload_image(upload, test_number)
+    success, total_time = poll_for_results(transaction_id, start_time, test_number)
+    return total_time if success else None
+
+
+def run_concurrent(uploads):
+    """Run several uploads at once against the already warm model."""
+    concurrency = len(uploads)
+    print("\n" + "="*60)
+    print(f"CONCURRENT TEST: {concurrency} uploads in parallel")
+    print("="*60)
+
+    # One pooled connection per worker thread
+    session.mount('http://', HTTPAdapter(pool_maxsize=concurrency))
+
+    batch_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [
+            executor.submit(run_one, upload, f"C{i}")
+            for i, upload in enumerate(uploads, 1)
+        ]
+        times = [future.result() for future in futures]
+
+    return report_times("CONCURRENT RESULTS", times, time.perf_counter() - batch_start)
+
+
+def upload_batch(images):
+    """Upload the images in one request; returns the transaction IDs."""
+    print(f"\nUploading {len(images)} images in one request...")
+    body, content_type = encode_upload(images, field='images')
+    try:
+        response = session.post(
+            f"{API_URL}/upload/batch/", data=body,
+            headers=upload_headers(content_type)
+        )
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        print(f"[ERROR] Batch upload failed!")
+        print(f"  Error: {e}")
+        sys.exit(1)
+
+    return [job['transaction_id'] for job in json_loads(response.content)['jobs']]
+
+
+def run_batch(images):
+    """Upload several images in a single request, then wait for all of them."""
+    count = len(images)
+    print("\n" + "="*60)
+    print(f"BATCH TEST: {count} images in one upload request")
+    print("="*60)
+
+    session.mount('http://', HTTPAdapter(pool_maxsize=count))
+
+    batch_start = time.perf_counter()
+    transaction_ids = upload_batch(images)
+    with ThreadPoolExecutor(max_workers=count) as executor:
+        futures = [
+            executor.submit(poll_for_results, transaction_id, batch_start, f"B{i}")
+            for i, transaction_id in enumerate(transaction_ids, 1)
+        ]
+        times = [
+            total_time if success else None
+            for success, total_time in (future.result() for future in futures)
+        ]
+
+    return report_times("BATCH RESULTS", times, time.perf_counter() - batch_start)
+
+
+def report_times(title, times, wall_time):
+    """Print timing statistics; returns True if every upload completed."""
+    completed = [t for t in times if t is not None]
+    print("\n" + "="*60)
+    print(title)
+    print("="*60)
+    print(f"\nCompleted: {len(completed)}/{len(times)} in {wall_time:.2f} seconds")
+    if completed:
+        print(f"Per upload: min {min(completed):.2f}s, "
+              f"median {statistics.median(completed):.2f}s, "
+              f"max {max(completed):.2f}s")
+    return len(completed) == len(times)
+
+
 def main():
     """Main function - runs two tests back-to-back."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--concurrency', type=int, default=0, metavar='N',
+        help='afterwards, also run N uploads in parallel'
+    )
+    parser.add_argument(
+        '--batch', type=int, default=0, metavar='N',
+        help='afterwards, also upload N images in a single request'
+    )
+    parser.add_argument(
+        '--verbose', action='store_true',
+        help='print every status response while waiting'
+    )
+    parser.add_argument(
+        '--reuse-results', action='store_true',
+        help='send the image hash as Idempotency-Key and allow cached OCR '
+             'results, so Test #2 returns the result of Test #1 instead of '
+             'running OCR again'
+    )
+    args = parser.parse_args()
+
+    global VERBOSE, BYPASS_RESULT_CACHE
+    VERBOSE = args.verbose
+    BYPASS_RESULT_CACHE = not args.reuse_results
+
     print("\n" + "="*60)
     print("DOUBLE TEST: Verifying model is loaded only once")
     print("="*60)
@@ -124,8 +341,15 @@ def main():
     print()
 
     try:
+        image_bytes = load_image(IMAGE_PATH)
+        idempotency_key = (
+            hashlib.sha256(image_bytes).hexdigest() if args.reuse_results else None
+        )
+        # Every upload sends the same pre-encoded body
+        upload = encode_upload([image_bytes])
+
         # Test #1
-        transaction_id_1, start_time_1 = upload_image(IMAGE_PATH, 1)
+        transaction_id_1, start_time_1 = upload_image(upload, 1, idempotency_key)
         success_1, time_1 = poll_for_results(transaction_id_1, start_time_1, 1)
 
         if not success_1:
@@ -139,7 +363,7 @@ def main():
         time.sleep(3)
 
         # Test #2
-        transaction_id_2, start_time_2 = upload_image(IMAGE_PATH, 2)
+        transaction_id_2, start_time_2 = upload_image(upload, 2, idempotency_key)
         success_2, time_2 = poll_for_results(transaction_id_2, start_time_2, 2)
 
         if not success_2:
@@ -169,12 +393,27 @@ def main():
         print("  - RAM should remain stable (not increase)")
         print("  - Both tests should use approximately the same memory")
 
+        if args.concurrency > 0 and not run_concurrent(
+            [upload] * args.concurrency
+        ):
+            print("\n[ERROR] Some concurrent uploads failed.")
+            sys.exit(1)
+
+        if args.batch > 0 and not run_batch(
+            [image_bytes] * args.batch
+        ):
+            print("\n[ERROR] Some batch uploads failed.")
+            sys.exit(1)
+
         sys.exit(0)
 
     except KeyboardInterrupt:
         print("\n\nTest interrupted by user")
         sys.exit(1)
 
+    finally:
+        session.close()
+
 
 if __name__ == "__main__":
     main()